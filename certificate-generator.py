@@ -8,8 +8,55 @@
 
 from typing import List
 from typing_extensions import Annotated, Literal
+import os
 import typer
 
+CA_VALIDITY_DAYS = 3650
+CA_CERTIFICATE_FILE = "ca.crt"
+CA_PRIVATE_KEY_FILE = "ca.key"
+KEY_USAGES = (
+    "digital_signature",
+    "content_commitment",
+    "key_encipherment",
+    "data_encipherment",
+    "key_agreement",
+    "key_cert_sign",
+    "crl_sign",
+    "encipher_only",
+    "decipher_only",
+)
+EXTENDED_KEY_USAGES = (
+    "server_auth",
+    "client_auth",
+    "code_signing",
+    "email_protection",
+    "time_stamping",
+    "ocsp_signing",
+)
+DEFAULT_PROFILES = {
+    "server": {
+        "key_usage": ["digital_signature", "key_encipherment"],
+        "extended_key_usage": ["server_auth"],
+    },
+    "client": {
+        "key_usage": ["digital_signature"],
+        "extended_key_usage": ["client_auth"],
+    },
+}
+OUTPUT_FORMATS = {
+    "pem": ".crt",
+    "der": ".der",
+    "pkcs8": ".pk8",
+    "fullchain": ".fullchain.pem",
+    "pkcs12": ".p12",
+}
+PKCS12_LEGACY_KDF_ROUNDS = 50000
+KEY_POOL_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "certificate-generator",
+    "key-pool",
+)
+
 
 # Helper functions
 def error_and_exit(error_message: str | None = "An error has occurred.") -> None:
@@ -23,6 +70,1038 @@ def error_and_exit(error_message: str | None = "An error has occurred.") -> None
     raise typer.Exit(code=1)
 
 
+def check_key_type(algorithm: str, key_length: int) -> None:
+    """
+    Helper to validate the key length for the specified algorithm.
+    """
+    if algorithm.upper() == "RSA":
+        if key_length not in (2048, 4096):
+            error_and_exit("Key length for RSA must be 2048 or 4096.")
+    elif algorithm.upper() == "ECDSA":
+        if key_length not in (256, 384):
+            error_and_exit("Key length for ECDSA must be 256 or 384.")
+    else:
+        error_and_exit("Invalid algorithm specified. Use 'RSA' or 'ECDSA'.")
+
+
+def generate_private_key(algorithm: str, key_length: int):
+    """
+    Helper to generate a private key based on the specified algorithm.
+    """
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.asymmetric import rsa, ec
+
+    if algorithm.upper() == "RSA":
+        return rsa.generate_private_key(
+            public_exponent=65537, key_size=key_length, backend=default_backend()
+        )
+    if key_length == 256:
+        return ec.generate_private_key(ec.SECP256R1(), default_backend())
+    return ec.generate_private_key(ec.SECP384R1(), default_backend())
+
+
+def generate_private_key_bytes(
+    algorithm: str, key_length: int, password: str = ""
+) -> bytes:
+    """
+    Helper to generate a private key in a worker process, returned as PKCS#8.
+
+    Key objects cannot be pickled, so they cross the process boundary serialized,
+    as DER or as encrypted PEM when a password is given.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    if password:
+        encoding = serialization.Encoding.PEM
+        encryption = serialization.BestAvailableEncryption(password.encode("utf-8"))
+    else:
+        encoding = serialization.Encoding.DER
+        encryption = serialization.NoEncryption()
+    return generate_private_key(algorithm, key_length).private_bytes(
+        encoding=encoding,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=encryption,
+    )
+
+
+def get_key_pool_path(pool_path: str, algorithm: str, key_length: int) -> str:
+    """
+    Helper to get the pool directory of one key type, only accessible by the owner.
+    """
+    key_pool_path = os.path.join(pool_path, f"{algorithm.upper()}-{key_length}")
+    os.makedirs(key_pool_path, mode=0o700, exist_ok=True)
+    directory_stat = os.stat(key_pool_path)
+    if directory_stat.st_uid != os.getuid() or directory_stat.st_mode & 0o077:
+        error_and_exit(f"Key pool has unsafe permissions: {key_pool_path}")
+    return key_pool_path
+
+
+def take_pooled_keys(
+    pool_path: str, algorithm: str, key_length: int, count: int, password: str
+) -> list:
+    """
+    Helper to take up to count ready keys out of the key pool.
+
+    A key is claimed by renaming it first, so concurrent runs never share a key.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    key_pool_path = get_key_pool_path(pool_path, algorithm, key_length)
+    private_keys = []
+    for key_file in sorted(os.listdir(key_pool_path)):
+        if len(private_keys) >= count:
+            break
+        if not key_file.endswith(".pem"):
+            continue
+        key_path = os.path.join(key_pool_path, key_file)
+        claimed_path = f"{key_path}.{os.getpid()}.claimed"
+        try:
+            os.rename(key_path, claimed_path)
+        except OSError:
+            continue
+        file_stat = os.stat(claimed_path)
+        if file_stat.st_uid != os.getuid() or file_stat.st_mode & 0o077:
+            typer.secho(
+                f"Removing pooled key with unsafe permissions: {key_path}",
+                fg=typer.colors.YELLOW,
+            )
+            os.remove(claimed_path)
+            continue
+        try:
+            with open(claimed_path, "rb") as f:
+                private_key = serialization.load_pem_private_key(
+                    f.read(), password=password.encode("utf-8")
+                )
+        except (ValueError, TypeError):
+            # Put the key back, a wrong password would fail for every key
+            os.rename(claimed_path, key_path)
+            typer.secho(
+                "Pooled keys could not be decrypted, check the key pool password.",
+                fg=typer.colors.YELLOW,
+            )
+            break
+        os.remove(claimed_path)
+        private_keys.append(private_key)
+    return private_keys
+
+
+def fill_key_pool(
+    pool_path: str,
+    algorithm: str,
+    key_length: int,
+    size: int,
+    password: str,
+    workers: int,
+) -> int:
+    """
+    Helper to generate encrypted keys until the pool holds size keys.
+
+    A lock file keeps concurrent refills from overfilling the pool.
+    Returns the number of keys that were added.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from cryptography.hazmat.primitives import serialization
+    import fcntl
+    import uuid
+
+    key_pool_path = get_key_pool_path(pool_path, algorithm, key_length)
+    descriptor = os.open(
+        os.path.join(key_pool_path, ".lock"), os.O_WRONLY | os.O_CREAT, 0o600
+    )
+    with os.fdopen(descriptor, "wb") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        ready = [name for name in os.listdir(key_pool_path) if name.endswith(".pem")]
+        # Never mix passwords in one pool
+        if ready:
+            try:
+                with open(os.path.join(key_pool_path, ready[0]), "rb") as f:
+                    serialization.load_pem_private_key(
+                        f.read(), password=password.encode("utf-8")
+                    )
+            except (OSError, ValueError, TypeError):
+                error_and_exit("Key pool password does not match the pooled keys.")
+        missing = max(size - len(ready), 0)
+        if not missing:
+            return 0
+        with ProcessPoolExecutor(max_workers=min(workers, missing)) as executor:
+            for private_key_bytes in executor.map(
+                generate_private_key_bytes,
+                [algorithm] * missing,
+                [key_length] * missing,
+                [password] * missing,
+            ):
+                key_path = os.path.join(key_pool_path, f"{uuid.uuid4().hex}.pem")
+                temp_path = f"{key_path}.tmp"
+                descriptor = os.open(
+                    temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600
+                )
+                with os.fdopen(descriptor, "wb") as f:
+                    f.write(private_key_bytes)
+                os.rename(temp_path, key_path)
+    return missing
+
+
+def refill_key_pool_in_background(
+    pool_path: str,
+    key_types: set[tuple[str, int]],
+    size: int,
+    password: str,
+) -> None:
+    """
+    Helper to start detached processes that refill the key pool after issuance.
+
+    The password is handed over in the environment to keep it out of the
+    process list.
+    """
+    import subprocess
+    import sys
+
+    for algorithm, key_length in key_types:
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--fill-key-pool",
+                "--key-pool-path",
+                pool_path,
+                "--key-pool-size",
+                str(size),
+                "--algorithm",
+                algorithm,
+                "--key-length",
+                str(key_length),
+            ],
+            env={**os.environ, "SCRIPT_KEY_POOL_PASSWORD": password},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def build_name(country: str, state: str, locality: str, organization: str, name: str):
+    """
+    Helper to build the subject or issuer name of a certificate.
+    """
+    from cryptography import x509
+
+    return x509.Name(
+        [
+            x509.NameAttribute(x509.NameOID.COUNTRY_NAME, country),
+            x509.NameAttribute(x509.NameOID.STATE_OR_PROVINCE_NAME, state),
+            x509.NameAttribute(x509.NameOID.LOCALITY_NAME, locality),
+            x509.NameAttribute(x509.NameOID.ORGANIZATION_NAME, organization),
+            x509.NameAttribute(x509.NameOID.COMMON_NAME, name),
+        ]
+    )
+
+
+def get_subject_alternative_names(names: list) -> list:
+    """
+    Helper to turn host names and IP addresses into SubjectAlternativeName entries.
+
+    Names that already are entries, i.e. the ones of a CSR, are kept as they are.
+    """
+    from cryptography import x509
+    import ipaddress
+
+    alternative_names = []
+    for name in names:
+        if isinstance(name, x509.GeneralName):
+            alternative_names.append(name)
+            continue
+        try:
+            alternative_names.append(x509.IPAddress(ipaddress.ip_address(name)))
+        except ValueError:
+            alternative_names.append(x509.DNSName(name))
+    return alternative_names
+
+
+def build_certificate(
+    subject,
+    public_key,
+    issuer_certificate,
+    issuer_key,
+    validity_days: int,
+    ca: bool = False,
+    subject_alternative_names: list | None = None,
+    extensions: list | None = None,
+    key_usage: List[str] | None = None,
+    extended_key_usage: List[str] | None = None,
+):
+    """
+    Helper to build and sign a certificate.
+
+    Without an issuer certificate the certificate is self-signed by issuer_key.
+    Extensions of an existing certificate can be copied over when renewing.
+    """
+    from cryptography import x509
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    import datetime
+
+    if key_usage and isinstance(public_key, ec.EllipticCurvePublicKey):
+        # EC keys cannot encrypt, key_encipherment is only valid for RSA keys
+        key_usage = [usage for usage in key_usage if usage != "key_encipherment"]
+    issuer = issuer_certificate.subject if issuer_certificate else subject
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer)
+        .public_key(public_key)
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=validity_days))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+        .add_extension(
+            x509.SubjectKeyIdentifier.from_public_key(public_key), critical=False
+        )
+    )
+    if issuer_certificate:
+        builder = builder.add_extension(
+            x509.AuthorityKeyIdentifier.from_issuer_public_key(
+                issuer_certificate.public_key()
+            ),
+            critical=False,
+        )
+    if subject_alternative_names:
+        builder = builder.add_extension(
+            x509.SubjectAlternativeName(
+                get_subject_alternative_names(subject_alternative_names)
+            ),
+            critical=False,
+        )
+    if key_usage:
+        builder = builder.add_extension(
+            x509.KeyUsage(**{usage: usage in key_usage for usage in KEY_USAGES}),
+            critical=True,
+        )
+    if extended_key_usage:
+        builder = builder.add_extension(
+            x509.ExtendedKeyUsage(
+                [
+                    getattr(x509.ExtendedKeyUsageOID, usage.upper())
+                    for usage in extended_key_usage
+                ]
+            ),
+            critical=False,
+        )
+    for extension in extensions or []:
+        builder = builder.add_extension(extension.value, critical=extension.critical)
+    return builder.sign(issuer_key, hashes.SHA256(), default_backend())
+
+
+def write_files(files: dict[str, tuple[bytes, int]]) -> None:
+    """
+    Helper to replace a set of files together, i.e. a certificate and its key.
+
+    Every file is written and synced to a temporary file first, so a failure
+    leaves the old files untouched and the renames happen back to back.
+    """
+    temp_files = {}
+    try:
+        for file_path, (content, mode) in files.items():
+            temp_path = f"{file_path}.{os.getpid()}.tmp"
+            temp_files[temp_path] = file_path
+            descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        for temp_path, file_path in temp_files.items():
+            os.replace(temp_path, file_path)
+    finally:
+        for temp_path in temp_files:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def write_certificate(
+    certificate,
+    private_key,
+    base_path: str,
+    chain: list | None = None,
+    write_key: bool = True,
+    output_formats: List[str] = ["pem"],
+    key_password: str = "",
+    pkcs12_legacy: bool = False,
+) -> list[str]:
+    """
+    Helper to write a certificate and its private key in every output format.
+
+    Formats are pem (.crt/.key), der (.der/.key.der), pkcs8 (.pk8), fullchain
+    (.fullchain.pem) and pkcs12 (.p12), all written together in one pass.
+    Keys are encrypted with key_password when given, only readable by the
+    owner and go in first, so a certificate never points to a missing key.
+    PKCS#12 bundles use AES-256 unless pkcs12_legacy asks for 3DES and SHA-1,
+    the only encryption Windows Server 2016 and older Java can import.
+    Returns the written files.
+    """
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    from cryptography.x509.oid import NameOID
+
+    if key_password:
+        encryption = serialization.BestAvailableEncryption(key_password.encode("utf-8"))
+    else:
+        encryption = serialization.NoEncryption()
+    chain = chain or []
+
+    key_files = {}
+    if write_key and "pem" in output_formats:
+        # Encrypted traditional PEM keys derive the key with a single MD5 round
+        key_files[f"{base_path}.key"] = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=(
+                serialization.PrivateFormat.PKCS8
+                if key_password
+                else serialization.PrivateFormat.TraditionalOpenSSL
+            ),
+            encryption_algorithm=encryption,
+        )
+    if write_key and "der" in output_formats:
+        key_files[f"{base_path}.key.der"] = private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=encryption,
+        )
+    if write_key and "pkcs8" in output_formats:
+        key_files[f"{base_path}.pk8"] = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=encryption,
+        )
+    if private_key is not None and "pkcs12" in output_formats:
+        pkcs12_encryption = encryption
+        if key_password and pkcs12_legacy:
+            pkcs12_encryption = (
+                serialization.PrivateFormat.PKCS12.encryption_builder()
+                .kdf_rounds(PKCS12_LEGACY_KDF_ROUNDS)
+                .key_cert_algorithm(pkcs12.PBES.PBESv1SHA1And3KeyTripleDESCBC)
+                .hmac_hash(hashes.SHA1())
+                .build(key_password.encode("utf-8"))
+            )
+        common_names = certificate.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+        key_files[f"{base_path}.p12"] = pkcs12.serialize_key_and_certificates(
+            name=common_names[0].value.encode("utf-8") if common_names else None,
+            key=private_key,
+            cert=certificate,
+            cas=chain or None,
+            encryption_algorithm=pkcs12_encryption,
+        )
+
+    certificate_files = {}
+    certificate_pem = certificate.public_bytes(serialization.Encoding.PEM)
+    if "pem" in output_formats:
+        certificate_files[f"{base_path}.crt"] = certificate_pem
+    if "der" in output_formats:
+        certificate_files[f"{base_path}.der"] = certificate.public_bytes(
+            serialization.Encoding.DER
+        )
+    if "fullchain" in output_formats:
+        certificate_files[f"{base_path}.fullchain.pem"] = certificate_pem + b"".join(
+            chain_certificate.public_bytes(serialization.Encoding.PEM)
+            for chain_certificate in chain
+        )
+
+    write_files(
+        {
+            **{file: (content, 0o600) for file, content in key_files.items()},
+            **{file: (content, 0o644) for file, content in certificate_files.items()},
+        }
+    )
+    return [*key_files, *certificate_files]
+
+
+def load_private_key(private_key_file: str, key_password: str = ""):
+    """
+    Helper to load a PEM private key, decrypting it when it is encrypted.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    with open(private_key_file, "rb") as f:
+        private_key_bytes = f.read()
+    password = None
+    if b"ENCRYPTED" in private_key_bytes:
+        password = key_password.encode("utf-8")
+    return serialization.load_pem_private_key(private_key_bytes, password=password)
+
+
+def load_ca(ca_path: str, key_password: str = ""):
+    """
+    Helper to load the local CA from ca_path, returns None when there is none yet.
+    """
+    from cryptography import x509
+
+    certificate_file = os.path.join(ca_path, CA_CERTIFICATE_FILE)
+    private_key_file = os.path.join(ca_path, CA_PRIVATE_KEY_FILE)
+    if not os.path.exists(certificate_file) or not os.path.exists(private_key_file):
+        return None
+    try:
+        with open(certificate_file, "rb") as f:
+            ca_certificate = x509.load_pem_x509_certificate(f.read())
+        ca_key = load_private_key(private_key_file, key_password)
+    except (OSError, ValueError, TypeError) as e:
+        error_and_exit(f"CA could not be loaded from {ca_path}: {e}")
+    return ca_certificate, ca_key
+
+
+def load_or_create_ca(
+    ca_path: str,
+    algorithm: str,
+    key_length: int,
+    subject_fields: dict[str, str],
+    key_password: str = "",
+):
+    """
+    Helper to load the local CA from ca_path, creating it on first use.
+    """
+    certificate_file = os.path.join(ca_path, CA_CERTIFICATE_FILE)
+    ca = load_ca(ca_path, key_password)
+    if ca:
+        typer.echo(f"CA: {certificate_file} (loaded)")
+        return ca
+
+    check_key_type(algorithm, key_length)
+    ca_key = generate_private_key(algorithm, key_length)
+    subject = build_name(
+        **subject_fields, name=f"{subject_fields['organization']} Local CA"
+    )
+    ca_certificate = build_certificate(
+        subject,
+        ca_key.public_key(),
+        None,
+        ca_key,
+        CA_VALIDITY_DAYS,
+        ca=True,
+        key_usage=["digital_signature", "key_cert_sign", "crl_sign"],
+    )
+    os.makedirs(ca_path, exist_ok=True)
+    write_certificate(
+        ca_certificate,
+        ca_key,
+        os.path.splitext(certificate_file)[0],
+        key_password=key_password,
+    )
+    typer.echo(f"CA: {certificate_file} (created)")
+    return ca_certificate, ca_key
+
+
+def load_profiles(profile_path: str) -> dict[str, dict]:
+    """
+    Helper to load named certificate profiles from a JSON file.
+
+    A profile holds any certificate setting, i.e.: key_usage,
+    extended_key_usage, validity_days or algorithm. The file is a mapping of
+    profile names and extends the built-in server and client profiles.
+    """
+    import json
+
+    profiles = dict(DEFAULT_PROFILES)
+    if profile_path:
+        try:
+            with open(profile_path) as f:
+                file_profiles = json.load(f)
+        except (OSError, ValueError) as e:
+            error_and_exit(f"Profile file could not be loaded: {e}")
+        if not isinstance(file_profiles, dict) or not all(
+            isinstance(profile, dict) for profile in file_profiles.values()
+        ):
+            error_and_exit("Profile file must contain a mapping of profiles.")
+        profiles.update(file_profiles)
+    return profiles
+
+
+def apply_profile(
+    settings: dict, profiles: dict[str, dict], overrides: dict | None = None
+) -> dict:
+    """
+    Helper to apply the named profile and then the overrides to settings.
+
+    The profile name comes from the overrides or the settings, the merged
+    settings are validated.
+    """
+    overrides = overrides or {}
+    profile_name = overrides.get("profile", settings.get("profile"))
+    if profile_name and profile_name not in profiles:
+        error_and_exit(
+            f"Unknown profile {profile_name}. Use {', '.join(sorted(profiles))}."
+        )
+    settings = {**settings, **profiles.get(profile_name, {}), **overrides}
+    settings["algorithm"] = settings["algorithm"].upper()
+    settings["key_length"] = int(settings["key_length"])
+    # Validate all key types up front instead of failing in a worker
+    check_key_type(settings["algorithm"], settings["key_length"])
+    for usage in settings.get("key_usage", []):
+        if usage not in KEY_USAGES:
+            error_and_exit(f"Invalid key usage {usage}. Use {', '.join(KEY_USAGES)}.")
+    for usage in settings.get("extended_key_usage", []):
+        if usage not in EXTENDED_KEY_USAGES:
+            error_and_exit(
+                f"Invalid extended key usage {usage}."
+                f" Use {', '.join(EXTENDED_KEY_USAGES)}."
+            )
+    return settings
+
+
+def load_certificate_manifest(
+    manifest_path: str, defaults: dict, profiles: dict[str, dict]
+) -> list[dict]:
+    """
+    Helper to load a JSON manifest of certificates to issue.
+
+    Every entry needs a name and may override the algorithm, key_length,
+    validity_days, subject fields, subject_alternative_names, key_usage,
+    extended_key_usage, profile and file. Entry settings win over the
+    profile, which wins over the defaults.
+    """
+    import json
+    import re
+
+    try:
+        with open(manifest_path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        error_and_exit(f"Manifest could not be loaded: {e}")
+    if not isinstance(entries, list):
+        error_and_exit("Manifest must contain a list of certificates.")
+
+    certificates = []
+    files = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("name"):
+            error_and_exit(f"Manifest entry is missing a name: {entry}")
+        certificate = apply_profile(defaults, profiles, entry)
+        certificate.setdefault("subject_alternative_names", [entry["name"]])
+        # Per-host files default to the name with unsafe characters replaced
+        certificate.setdefault("file", re.sub(r"[^\w.-]", "_", entry["name"]))
+        if certificate["file"] in files:
+            error_and_exit(
+                f"Manifest has more than one entry for {certificate['file']}."
+            )
+        files.add(certificate["file"])
+        certificates.append(certificate)
+    return certificates
+
+
+def issue_certificates(
+    certificates: list[dict],
+    ca_certificate,
+    ca_key,
+    path: str,
+    workers: int,
+    key_pool: dict | None = None,
+    **output_options,
+) -> None:
+    """
+    Helper to issue certificates signed by the CA into per-host files.
+
+    Key generation is the expensive step, so ready keys are taken from the key
+    pool first and the rest is generated on a process pool, while signing and
+    writing stay in this process.
+    """
+    key_types = [
+        (certificate["algorithm"], certificate["key_length"])
+        for certificate in certificates
+    ]
+    private_keys = get_private_keys(key_types, workers, key_pool)
+    for certificate, private_key in zip(certificates, private_keys):
+        subject = build_name(
+            certificate["country"],
+            certificate["state"],
+            certificate["locality"],
+            certificate["organization"],
+            certificate["name"],
+        )
+        leaf_certificate = build_certificate(
+            subject,
+            private_key.public_key(),
+            ca_certificate,
+            ca_key,
+            certificate["validity_days"],
+            subject_alternative_names=certificate["subject_alternative_names"],
+            key_usage=certificate.get("key_usage"),
+            extended_key_usage=certificate.get("extended_key_usage"),
+        )
+        files = write_certificate(
+            leaf_certificate,
+            private_key,
+            os.path.join(path, certificate["file"]),
+            [ca_certificate],
+            **output_options,
+        )
+        typer.echo(f" - {', '.join(files)} ({certificate['algorithm']})")
+
+
+def sign_certificate_requests(
+    request_paths: List[str],
+    ca_certificate,
+    ca_key,
+    settings: dict,
+    path: str,
+    **output_options,
+) -> None:
+    """
+    Helper to sign externally generated CSRs with the CA into per-request files.
+
+    The subject and requested alternative names come from the CSR, while
+    validity and key usages come from the settings and profile, so the CA
+    decides what a certificate may be used for.
+    """
+    from cryptography import x509
+
+    for request_path in request_paths:
+        try:
+            with open(request_path, "rb") as f:
+                request_bytes = f.read()
+            if b"-----BEGIN CERTIFICATE REQUEST-----" in request_bytes:
+                request = x509.load_pem_x509_csr(request_bytes)
+            else:
+                request = x509.load_der_x509_csr(request_bytes)
+        except (OSError, ValueError) as e:
+            error_and_exit(f"CSR {request_path} could not be loaded: {e}")
+        if not request.is_signature_valid:
+            error_and_exit(f"CSR {request_path} has an invalid signature.")
+
+        subject_alternative_names = get_subject_alternative_names(
+            settings.get("subject_alternative_names", [])
+        )
+        try:
+            requested_names = request.extensions.get_extension_for_class(
+                x509.SubjectAlternativeName
+            ).value
+        except x509.ExtensionNotFound:
+            requested_names = []
+        # Requested names keep their type, i.e. e-mail addresses and URIs
+        for requested_name in requested_names:
+            if requested_name not in subject_alternative_names:
+                subject_alternative_names.append(requested_name)
+
+        certificate = build_certificate(
+            request.subject,
+            request.public_key(),
+            ca_certificate,
+            ca_key,
+            settings["validity_days"],
+            subject_alternative_names=subject_alternative_names,
+            key_usage=settings.get("key_usage"),
+            extended_key_usage=settings.get("extended_key_usage"),
+        )
+        # There is no private key for a CSR, only the certificate is written
+        output_formats = [
+            output_format
+            for output_format in output_options.get("output_formats", ["pem"])
+            if output_format != "pkcs12"
+        ]
+        files = write_certificate(
+            certificate,
+            None,
+            os.path.join(path, os.path.splitext(os.path.basename(request_path))[0]),
+            [ca_certificate],
+            write_key=False,
+            output_formats=output_formats,
+        )
+        typer.echo(f" - {', '.join(files)} (signed)")
+
+
+def get_private_keys(
+    key_types: list[tuple[str, int]], workers: int, key_pool: dict | None = None
+) -> list:
+    """
+    Helper to get one private key per (algorithm, key length) in the same order.
+
+    Ready keys are taken from the key pool first and the rest is generated on
+    a process pool.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from cryptography.hazmat.primitives import serialization
+
+    pooled_keys: dict[tuple[str, int], list] = {}
+    if key_pool:
+        for key_type in set(key_types):
+            pooled_keys[key_type] = take_pooled_keys(
+                key_pool["path"],
+                *key_type,
+                key_types.count(key_type),
+                key_pool["password"],
+            )
+    private_keys = [
+        pooled_keys[key_type].pop() if pooled_keys.get(key_type) else None
+        for key_type in key_types
+    ]
+    missing_key_types = [
+        key_type
+        for key_type, private_key in zip(key_types, private_keys)
+        if private_key is None
+    ]
+
+    if not missing_key_types:
+        return private_keys
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        generated_keys = executor.map(
+            generate_private_key_bytes,
+            [algorithm for algorithm, _ in missing_key_types],
+            [key_length for _, key_length in missing_key_types],
+        )
+        return [
+            private_key
+            or serialization.load_der_private_key(next(generated_keys), password=None)
+            for private_key in private_keys
+        ]
+
+
+def read_not_after(certificate_file: str):
+    """
+    Helper to read only the notAfter date of a PEM or DER certificate.
+
+    Walks the DER header fields up to the validity instead of parsing the
+    whole certificate, so scanning large trees stays cheap. Returns None for
+    files that are not certificates.
+    """
+    import base64
+    import binascii
+    import datetime
+
+    def read_header(offset: int) -> tuple[int, int, int]:
+        tag, length = data[offset], data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            size = length & 0x7F
+            length = int.from_bytes(data[offset : offset + size], "big")
+            offset += size
+        return tag, offset, length
+
+    try:
+        with open(certificate_file, "rb") as f:
+            data = f.read()
+        if b"-----BEGIN CERTIFICATE-----" in data:
+            pem = data.split(b"-----BEGIN CERTIFICATE-----", 1)[1]
+            data = base64.b64decode(pem.split(b"-----END CERTIFICATE-----", 1)[0])
+        # Enter Certificate and TBSCertificate, skip the optional version
+        _, offset, _ = read_header(0)
+        _, offset, _ = read_header(offset)
+        tag, start, length = read_header(offset)
+        if tag == 0xA0:
+            tag, start, length = read_header(start + length)
+        # Skip serial number, signature algorithm and issuer, enter validity
+        for _ in range(2):
+            _, start, length = read_header(start + length)
+        _, offset, _ = read_header(start + length)
+        _, start, length = read_header(offset)
+        tag, start, length = read_header(start + length)
+        not_after = data[start : start + length].decode("ascii")
+        time_format = "%y%m%d%H%M%SZ" if tag == 0x17 else "%Y%m%d%H%M%SZ"
+        return datetime.datetime.strptime(not_after, time_format).replace(
+            tzinfo=datetime.timezone.utc
+        )
+    except (OSError, IndexError, ValueError, binascii.Error):
+        return None
+
+
+def index_certificates(path: str, exclude: set[str]) -> list[tuple[object, str]]:
+    """
+    Helper to find all certificates in a directory tree sorted by expiry.
+    """
+    index = []
+    for directory, _, files in os.walk(path):
+        for file in files:
+            certificate_file = os.path.join(directory, file)
+            if (
+                not file.endswith(".crt")
+                or os.path.abspath(certificate_file) in exclude
+            ):
+                continue
+            not_after = read_not_after(certificate_file)
+            if not_after:
+                index.append((not_after, certificate_file))
+    return sorted(index)
+
+
+def get_key_type(key) -> tuple[str, int]:
+    """
+    Helper to get the algorithm and key length of a key.
+    """
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    if isinstance(key, (rsa.RSAPublicKey, rsa.RSAPrivateKey)):
+        return "RSA", key.key_size
+    return "ECDSA", key.curve.key_size
+
+
+def renew_certificates(
+    path: str,
+    renew_days: int,
+    reuse_key: bool,
+    ca_path: str,
+    workers: int,
+    key_pool: dict | None = None,
+    **output_options,
+) -> int:
+    """
+    Helper to reissue the certificates of a directory tree that expire soon.
+
+    Renewed certificates keep their subject, extensions and validity period
+    and are signed by the local CA or self-signed, like they were issued.
+    Returns the number of renewed certificates.
+    """
+    from cryptography import x509
+    import datetime
+
+    ca_certificate_file = os.path.join(ca_path, CA_CERTIFICATE_FILE)
+    index = index_certificates(path, {os.path.abspath(ca_certificate_file)})
+    now = datetime.datetime.now(datetime.timezone.utc)
+    threshold = now + datetime.timedelta(days=renew_days)
+    typer.secho(f"Found {len(index)} certificates:", fg=typer.colors.BLUE)
+    for not_after, certificate_file in index:
+        status = "renew" if not_after <= threshold else "valid"
+        typer.echo(
+            f" - {certificate_file}: {not_after:%Y-%m-%d}"
+            f" ({(not_after - now).days} days, {status})"
+        )
+
+    ca_certificate = ca_key = None
+    ca_loaded = False
+    renewals = []
+    for not_after, certificate_file in index:
+        if not_after > threshold:
+            break
+        private_key_file = os.path.splitext(certificate_file)[0] + ".key"
+        with open(certificate_file, "rb") as f:
+            certificate_bytes = f.read()
+        if b"-----BEGIN CERTIFICATE-----" in certificate_bytes:
+            certificate = x509.load_pem_x509_certificate(certificate_bytes)
+        else:
+            certificate = x509.load_der_x509_certificate(certificate_bytes)
+
+        # The CA is only needed, and loaded once, for certificates it issued
+        if certificate.issuer != certificate.subject and not ca_loaded:
+            ca_certificate, ca_key = load_ca(
+                ca_path, output_options.get("key_password", "")
+            ) or (None, None)
+            ca_loaded = True
+        if certificate.issuer != certificate.subject and ca_certificate is None:
+            typer.secho(
+                f"Skipping {certificate_file}, no CA was found in {ca_path}.",
+                fg=typer.colors.YELLOW,
+            )
+            continue
+        if certificate.issuer != certificate.subject and (
+            certificate.issuer != ca_certificate.subject
+        ):
+            typer.secho(
+                f"Skipping {certificate_file}, it was not issued by the local CA.",
+                fg=typer.colors.YELLOW,
+            )
+            continue
+
+        # Certificates signed from a CSR have no local key, the requester
+        # keeps it, so they are renewed for the public key they were issued for
+        external_key = not os.path.exists(private_key_file)
+        if external_key and certificate.issuer == certificate.subject:
+            typer.secho(
+                f"Skipping {certificate_file}, its key {private_key_file}"
+                " could not be found.",
+                fg=typer.colors.YELLOW,
+            )
+            continue
+
+        private_key = None
+        if reuse_key and not external_key:
+            try:
+                private_key = load_private_key(
+                    private_key_file, output_options.get("key_password", "")
+                )
+            except (OSError, ValueError, TypeError):
+                typer.secho(
+                    f"Skipping {certificate_file}, its key {private_key_file}"
+                    " could not be loaded.",
+                    fg=typer.colors.YELLOW,
+                )
+                continue
+        elif not external_key and not output_options.get("key_password"):
+            # A new key replaces the old one, it must not lose its encryption
+            with open(private_key_file, "rb") as f:
+                key_is_encrypted = b"ENCRYPTED" in f.read()
+            if key_is_encrypted:
+                typer.secho(
+                    f"Skipping {certificate_file}, its key {private_key_file}"
+                    " is encrypted, renew it with --key-password.",
+                    fg=typer.colors.YELLOW,
+                )
+                continue
+        renewals.append((certificate, certificate_file, private_key, external_key))
+
+    # Generate new keys of the same type for all renewals at once
+    new_key_types = [
+        get_key_type(certificate.public_key())
+        for certificate, _, private_key, external_key in renewals
+        if private_key is None and not external_key
+    ]
+    new_keys = iter(get_private_keys(new_key_types, workers, key_pool))
+    for certificate, certificate_file, private_key, external_key in renewals:
+        key_is_new = private_key is None and not external_key
+        if key_is_new:
+            private_key = next(new_keys)
+        public_key = (
+            certificate.public_key() if external_key else private_key.public_key()
+        )
+        self_signed = certificate.issuer == certificate.subject
+        basic_constraints = certificate.extensions.get_extension_for_class(
+            x509.BasicConstraints
+        ).value
+        extensions = [
+            extension
+            for extension in certificate.extensions
+            if not isinstance(
+                extension.value,
+                (
+                    x509.BasicConstraints,
+                    x509.SubjectKeyIdentifier,
+                    x509.AuthorityKeyIdentifier,
+                ),
+            )
+        ]
+        validity = certificate.not_valid_after_utc - certificate.not_valid_before_utc
+        renewed_certificate = build_certificate(
+            certificate.subject,
+            public_key,
+            None if self_signed else ca_certificate,
+            private_key if self_signed else ca_key,
+            validity.days,
+            ca=basic_constraints.ca,
+            extensions=extensions,
+        )
+        # Formats that were written before are renewed too, so none goes stale
+        base_path = os.path.splitext(certificate_file)[0]
+        output_formats = [
+            output_format
+            for output_format, suffix in OUTPUT_FORMATS.items()
+            if (
+                output_format in output_options.get("output_formats", ["pem"])
+                or os.path.exists(base_path + suffix)
+            )
+            and not (external_key and output_format == "pkcs12")
+        ]
+        # A reused key is already in place, only the certificates are replaced
+        write_certificate(
+            renewed_certificate,
+            private_key,
+            base_path,
+            [] if self_signed else [ca_certificate],
+            write_key=key_is_new,
+            output_formats=output_formats,
+            key_password=output_options.get("key_password", ""),
+            pkcs12_legacy=output_options.get("pkcs12_legacy", False),
+        )
+        typer.echo(f" - {certificate_file} (renewed)")
+    return len(renewals)
+
+
 # Main script
 def main(
     key_length: Annotated[
@@ -107,83 +1186,350 @@ def main(
             help="i.e.: /tmp/output",
         ),
     ] = ".",
+    manifest_path: Annotated[
+        str,
+        typer.Option(
+            "--manifest",
+            "-m",
+            envvar="SCRIPT_MANIFEST",
+            help="JSON list of certificates to issue with a local CA,"
+            ' i.e.: [{"name": "web.local", "subject_alternative_names": ["10.0.0.1"]}]',
+        ),
+    ] = "",
+    ca_path: Annotated[
+        str,
+        typer.Option(
+            "--ca-path",
+            envvar="SCRIPT_CA_PATH",
+            help="Directory of the local CA, created when missing, i.e.: /tmp/ca",
+        ),
+    ] = "",
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            envvar="SCRIPT_WORKERS",
+            help="Number of processes used to generate keys for a manifest",
+        ),
+    ] = os.cpu_count()
+    or 1,
+    subject_alternative_names: Annotated[
+        List[str],
+        typer.Option(
+            "--san",
+            envvar="SCRIPT_SAN",
+            help="DNS name or IP address, repeat for more, i.e.: web.local",
+        ),
+    ] = [],
+    key_usage: Annotated[
+        List[str],
+        typer.Option(
+            "--key-usage",
+            envvar="SCRIPT_KEY_USAGE",
+            help="Key usage, repeat for more, i.e.: digital_signature",
+        ),
+    ] = [],
+    extended_key_usage: Annotated[
+        List[str],
+        typer.Option(
+            "--extended-key-usage",
+            envvar="SCRIPT_EXTENDED_KEY_USAGE",
+            help="Extended key usage, repeat for more, i.e.: server_auth",
+        ),
+    ] = [],
+    profile: Annotated[
+        str,
+        typer.Option(
+            "--profile",
+            "-P",
+            envvar="SCRIPT_PROFILE",
+            help="Named profile of certificate settings, i.e.: server",
+        ),
+    ] = "",
+    profile_path: Annotated[
+        str,
+        typer.Option(
+            "--profile-file",
+            envvar="SCRIPT_PROFILE_FILE",
+            help='JSON profiles, i.e.: {"web": {"extended_key_usage": ["server_auth"]}}',
+        ),
+    ] = "",
+    request_paths: Annotated[
+        List[str],
+        typer.Option(
+            "--csr",
+            envvar="SCRIPT_CSR",
+            help="CSR to sign with the local CA, repeat for more, i.e.: /tmp/web.csr",
+        ),
+    ] = [],
+    output_formats: Annotated[
+        List[str],
+        typer.Option(
+            "--format",
+            "-f",
+            envvar="SCRIPT_FORMAT",
+            help="Output format, repeat for more: pem, der, pkcs8, fullchain or pkcs12",
+        ),
+    ] = ["pem"],
+    key_password: Annotated[
+        str,
+        typer.Option(
+            "--key-password",
+            envvar="SCRIPT_KEY_PASSWORD",
+            help="Password used to encrypt the private keys and PKCS#12 bundles",
+        ),
+    ] = "",
+    pkcs12_legacy: Annotated[
+        bool,
+        typer.Option(
+            "--pkcs12-legacy",
+            help="Encrypt PKCS#12 bundles with 3DES for Windows Server 2016 and older Java",
+        ),
+    ] = False,
+    key_pool_enabled: Annotated[
+        bool,
+        typer.Option(
+            "--key-pool",
+            "-K",
+            help="Take pre-generated keys from the key pool and refill it afterwards",
+        ),
+    ] = False,
+    fill_key_pool_only: Annotated[
+        bool,
+        typer.Option(
+            "--fill-key-pool",
+            help="Only fill the key pool for the algorithm and key length",
+        ),
+    ] = False,
+    key_pool_size: Annotated[
+        int,
+        typer.Option(
+            "--key-pool-size",
+            envvar="SCRIPT_KEY_POOL_SIZE",
+            help="Number of ready keys kept per algorithm and key length",
+        ),
+    ] = 16,
+    key_pool_path: Annotated[
+        str,
+        typer.Option(
+            "--key-pool-path",
+            envvar="SCRIPT_KEY_POOL_PATH",
+            help="i.e.: /tmp/key-pool",
+        ),
+    ] = KEY_POOL_DIR,
+    renew: Annotated[
+        bool,
+        typer.Option(
+            "--renew",
+            help="Renew the certificates in the output path tree that expire soon",
+        ),
+    ] = False,
+    renew_days: Annotated[
+        int,
+        typer.Option(
+            "--renew-days",
+            envvar="SCRIPT_RENEW_DAYS",
+            help="Renew certificates that expire within this many days",
+        ),
+    ] = 30,
+    reuse_key: Annotated[
+        bool,
+        typer.Option(
+            "--reuse-key",
+            help="Keep the existing private key when renewing",
+        ),
+    ] = False,
+    key_pool_password: Annotated[
+        str,
+        typer.Option(
+            "--key-pool-password",
+            envvar="SCRIPT_KEY_POOL_PASSWORD",
+            help="Password used to encrypt the keys in the key pool",
+        ),
+    ] = "",
 ) -> None:
     """
     Generate a self-signed SSL certificate and private key.
     """
-    from cryptography import x509
-    from cryptography.hazmat.backends import default_backend
-    from cryptography.hazmat.primitives import hashes, serialization
-    from cryptography.hazmat.primitives.asymmetric import rsa, ec
-    import datetime
-    import os
-
-    # Generate private key based on the specified algorithm
-    if algorithm.upper() == "RSA":
-        private_key = rsa.generate_private_key(
-            public_exponent=65537, key_size=key_length, backend=default_backend()
-        )
-    elif algorithm.upper() == "ECDSA":
-        if key_length not in (256, 384):
-            error_and_exit("Key length for ECDSA must be 256 or 384.")
-        if key_length == 256:
-            private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
-        else:
-            private_key = ec.generate_private_key(ec.SECP384R1(), default_backend())
-    else:
-        error_and_exit("Invalid algorithm specified. Use 'RSA' or 'ECDSA'.")
+    # Get output file names
+    if path == ".":
+        path = os.getcwd()
+    path = os.path.expanduser(path)
 
-    # Build a self-signed certificate
-    subject = x509.Name(
-        [
-            x509.NameAttribute(x509.NameOID.COUNTRY_NAME, country),
-            x509.NameAttribute(x509.NameOID.STATE_OR_PROVINCE_NAME, state),
-            x509.NameAttribute(x509.NameOID.LOCALITY_NAME, locality),
-            x509.NameAttribute(x509.NameOID.ORGANIZATION_NAME, organization),
-            x509.NameAttribute(x509.NameOID.COMMON_NAME, name),
-        ]
-    )
+    output_formats = [output_format.lower() for output_format in output_formats]
+    for output_format in output_formats:
+        if output_format not in OUTPUT_FORMATS:
+            error_and_exit(
+                f"Invalid format {output_format}. Use {', '.join(OUTPUT_FORMATS)}."
+            )
+    output_options = {
+        "output_formats": output_formats,
+        "key_password": key_password,
+        "pkcs12_legacy": pkcs12_legacy,
+    }
 
-    issuer = subject  # Self-signed certificate, thus issuer is equal to subject
+    key_pool = None
+    if key_pool_enabled or fill_key_pool_only:
+        if not key_pool_password:
+            error_and_exit("The key pool needs a --key-pool-password.")
+        key_pool = {
+            "path": os.path.expanduser(key_pool_path),
+            "password": key_pool_password,
+        }
+    if fill_key_pool_only:
+        check_key_type(algorithm, key_length)
+        added = fill_key_pool(
+            key_pool["path"],
+            algorithm,
+            key_length,
+            key_pool_size,
+            key_pool_password,
+            max(workers, 1),
+        )
+        typer.secho(
+            f"{added} {algorithm} {key_length} keys have been added to the key pool.",
+            fg=typer.colors.GREEN,
+        )
+        return
 
-    cert = (
-        x509.CertificateBuilder()
-        .subject_name(subject)
-        .issuer_name(issuer)
-        .public_key(private_key.public_key())
-        .serial_number(x509.random_serial_number())
-        .not_valid_before(datetime.datetime.utcnow())
-        .not_valid_after(
-            datetime.datetime.utcnow() + datetime.timedelta(days=validity_days)
+    if renew:
+        renewed = renew_certificates(
+            path,
+            renew_days,
+            reuse_key,
+            os.path.expanduser(ca_path) or path,
+            max(workers, 1),
+            key_pool,
+            **output_options,
         )
-        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
-        .sign(private_key, hashes.SHA256(), default_backend())
-    )
+        typer.secho(
+            f"{renewed} certificates have been successfully renewed.",
+            fg=typer.colors.GREEN,
+        )
+        return
 
-    # Get output file names
-    if path == ".":
-        path = os.getcwd()
+    subject_fields = {
+        "country": country,
+        "state": state,
+        "locality": locality,
+        "organization": organization,
+    }
+    profiles = load_profiles(profile_path)
+    defaults = {
+        **subject_fields,
+        "algorithm": algorithm,
+        "key_length": key_length,
+        "validity_days": validity_days,
+        "profile": profile,
+    }
+    if key_usage:
+        defaults["key_usage"] = [usage.lower() for usage in key_usage]
+    if extended_key_usage:
+        defaults["extended_key_usage"] = [usage.lower() for usage in extended_key_usage]
+    settings = apply_profile(defaults, profiles)
+    if subject_alternative_names:
+        settings["subject_alternative_names"] = subject_alternative_names
 
-    certificate_file = os.path.join(os.path.expanduser(path), "certificate.crt")
-    private_key_file = os.path.join(os.path.expanduser(path), "certificate.key")
+    if request_paths:
+        ca_certificate, ca_key = load_or_create_ca(
+            os.path.expanduser(ca_path) or path,
+            algorithm,
+            key_length,
+            subject_fields,
+            key_password,
+        )
+        os.makedirs(path, exist_ok=True)
+        sign_certificate_requests(
+            request_paths, ca_certificate, ca_key, settings, path, **output_options
+        )
+        typer.secho(
+            f"{len(request_paths)} certificate requests have been successfully signed.",
+            fg=typer.colors.GREEN,
+        )
+        return
 
-    # Write the private key to a file
-    with open(private_key_file, "wb") as f:
-        f.write(
-            private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.TraditionalOpenSSL,
-                encryption_algorithm=serialization.NoEncryption(),
+    if manifest_path:
+        certificates = load_certificate_manifest(manifest_path, defaults, profiles)
+        ca_certificate, ca_key = load_or_create_ca(
+            os.path.expanduser(ca_path) or path,
+            algorithm,
+            key_length,
+            subject_fields,
+            key_password,
+        )
+        os.makedirs(path, exist_ok=True)
+        issue_certificates(
+            certificates,
+            ca_certificate,
+            ca_key,
+            path,
+            max(workers, 1),
+            key_pool,
+            **output_options,
+        )
+        if key_pool:
+            refill_key_pool_in_background(
+                key_pool["path"],
+                {
+                    (certificate["algorithm"], certificate["key_length"])
+                    for certificate in certificates
+                },
+                key_pool_size,
+                key_pool_password,
             )
+        typer.secho(
+            f"{len(certificates)} certificates and private keys have been successfully"
+            " created.",
+            fg=typer.colors.GREEN,
+        )
+        return
+
+    # Generate a private key and build a self-signed certificate
+    algorithm, key_length = settings["algorithm"], settings["key_length"]
+    private_keys = []
+    if key_pool:
+        private_keys = take_pooled_keys(
+            key_pool["path"], algorithm, key_length, 1, key_pool_password
         )
+        refill_key_pool_in_background(
+            key_pool["path"],
+            {(algorithm, key_length)},
+            key_pool_size,
+            key_pool_password,
+        )
+    if private_keys:
+        private_key = private_keys[0]
+    else:
+        private_key = generate_private_key(algorithm, key_length)
+    subject = build_name(
+        settings["country"],
+        settings["state"],
+        settings["locality"],
+        settings["organization"],
+        name,
+    )
+    cert = build_certificate(
+        subject,
+        private_key.public_key(),
+        None,
+        private_key,
+        settings["validity_days"],
+        # Leaf usages without key_cert_sign make it an end entity certificate
+        ca="key_cert_sign" in (settings.get("key_usage") or [])
+        or not (settings.get("key_usage") or settings.get("extended_key_usage")),
+        subject_alternative_names=settings.get("subject_alternative_names"),
+        key_usage=settings.get("key_usage"),
+        extended_key_usage=settings.get("extended_key_usage"),
+    )
 
-    # Write the certificate to a file
-    with open(certificate_file, "wb") as f:
-        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    files = write_certificate(
+        cert, private_key, os.path.join(path, "certificate"), **output_options
+    )
 
     typer.echo(f"Algorithm: {algorithm}")
-    typer.echo(f"Private Key: {private_key_file}")
-    typer.echo(f"Certificate: {certificate_file}")
+    for file in files:
+        typer.echo(f"Output: {file}")
 
     typer.secho(
         "Self-signed SSL certificate and private key have been successfully created.",
@@ -6,12 +6,20 @@
 # ]
 # ///
 
+from functools import cache
+from typing import Any
 from typing_extensions import Annotated, Literal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
 import typer
 import requests
 
-
 DNS_BASE_URL = "https://api.cloudflare.com/client/v4"
+DNS_PAGE_SIZE = 1000
+HTTP_TIMEOUT = float(os.environ.get("SCRIPT_HTTP_TIMEOUT", "30"))
+HTTP_POOL_SIZE = int(os.environ.get("SCRIPT_HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.environ.get("SCRIPT_HTTP_RETRIES", "3"))
 
 
 # Helper functions
@@ -26,6 +34,52 @@ def error_and_exit(error_message: str | None = "An error has occurred.") -> None
     raise typer.Exit(code=1)
 
 
+class RateLimitRetry(Retry):
+    """
+    Retry policy that also retries non-idempotent requests on HTTP 429.
+    """
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that applies a default timeout to every request.
+    """
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = HTTP_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+@cache
+def get_session() -> requests.Session:
+    """
+    Helper to get a pooled HTTP session with keep-alive and retries.
+    """
+    retries = RateLimitRetry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def validate_http_status_code(response: requests.models.Response) -> None:
     """
     Helper validate and error on http status code.
@@ -43,19 +97,191 @@ def validate_json_key(json_key: str, response: requests.models.Response) -> None
         error_and_exit(f"JSON key {json_key} not found.")
 
 
+@cache
+def get_public_ip() -> str:
+    """
+    Helper to get the public ip address of the host system once per run.
+    """
+    return get_session().get("https://checkip.amazonaws.com").text.strip()
+
+
 def value_callback(value: str) -> str:
     """
-    Gets the public ip address of the host system.
+    Gets the public ip address of the host system when no value is given.
     """
     if value == "":
-        import requests
-
-        value = requests.get("https://checkip.amazonaws.com").text.strip()
+        value = get_public_ip()
     return value
 
 
+def get_headers(api_token: str) -> dict[str, str]:
+    """
+    Helper to build the Cloudflare API headers.
+    """
+    return {
+        "Content-Type": "application/json",
+        "Authorization": "Bearer " + api_token,
+    }
+
+
+def load_manifest(manifest_path: str) -> dict[str, list[dict[str, str]]]:
+    """
+    Helper to load a JSON manifest of records and group them by zone.
+    """
+    import json
+
+    try:
+        with open(manifest_path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        error_and_exit(f"Manifest could not be loaded: {e}")
+
+    records_by_zone: dict[str, list[dict[str, str]]] = {}
+    seen_records = set()
+    for entry in entries:
+        if "zone_id" not in entry or "fqdn" not in entry:
+            error_and_exit(f"Manifest entry is missing zone_id or fqdn: {entry}")
+        record_type = entry.get("type", "A").upper()
+        if record_type not in ("A", "CNAME"):
+            error_and_exit(
+                f"Unsupported record type {record_type} for {entry['fqdn']}."
+            )
+        fqdn = entry["fqdn"].lower().rstrip(".")
+        # Two entries would patch the same record and the last one would win
+        if (entry["zone_id"], fqdn, record_type) in seen_records:
+            error_and_exit(f"Duplicate manifest entry for {record_type} {fqdn}.")
+        seen_records.add((entry["zone_id"], fqdn, record_type))
+        records_by_zone.setdefault(entry["zone_id"], []).append(
+            {
+                "fqdn": fqdn,
+                "type": record_type,
+                "value": value_callback(entry.get("value", "")),
+            }
+        )
+    return records_by_zone
+
+
+def list_dns_records(zone_id: str, api_token: str) -> list[dict[str, Any]]:
+    """
+    Helper to page through every DNS record of a zone.
+    """
+    endpoint_url = DNS_BASE_URL + f"/zones/{zone_id}/dns_records"
+    records: list[dict[str, Any]] = []
+    page = total_pages = 1
+    while page <= total_pages:
+        params = {"page": page, "per_page": DNS_PAGE_SIZE}
+        try:
+            response = get_session().get(
+                url=endpoint_url, headers=get_headers(api_token), params=params
+            )
+            validate_http_status_code(response)
+            validate_json_key("success", response)
+            json_data = response.json()
+        except OSError:
+            error_and_exit("DNS API call could not be completed.")
+        if not json_data["success"]:
+            error_and_exit(f"DNS API call failed for zone {zone_id}.")
+        records.extend(json_data["result"])
+        total_pages = json_data["result_info"].get("total_pages", 1)
+        page += 1
+    return records
+
+
+def update_dns_record(zone_id: str, record_id: str, value: str, api_token: str) -> None:
+    """
+    Helper to update the content of a single DNS record.
+    """
+    endpoint_url = DNS_BASE_URL + f"/zones/{zone_id}/dns_records/{record_id}"
+    payload = {"content": value}
+    try:
+        response = get_session().patch(
+            url=endpoint_url, json=payload, headers=get_headers(api_token)
+        )
+        validate_http_status_code(response)
+        validate_json_key("success", response)
+        json_data = response.json()
+        if not json_data["success"]:
+            error_and_exit("DNS API call failed.")
+    except OSError:
+        error_and_exit("DNS API call could not be completed.")
+
+
+def batch_update_dns_records(
+    zone_id: str, patches: list[dict[str, str]], api_token: str
+) -> bool:
+    """
+    Helper to send all record changes of a zone in one batch request.
+
+    Returns False when the batch endpoint is not usable so the caller can
+    fall back to single record updates.
+    """
+    endpoint_url = DNS_BASE_URL + f"/zones/{zone_id}/dns_records/batch"
+    try:
+        response = get_session().post(
+            url=endpoint_url,
+            json={"patches": patches},
+            headers=get_headers(api_token),
+        )
+        return response.ok and response.json().get("success", False)
+    except (OSError, ValueError):
+        return False
+
+
+def sync_dns_records(manifest_path: str, api_token: str) -> None:
+    """
+    Helper to update all the records of a manifest with one listing per zone.
+    """
+    records_by_zone = load_manifest(manifest_path)
+    for zone_id, wanted_records in records_by_zone.items():
+        existing_records: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for record in list_dns_records(zone_id, api_token):
+            existing_records.setdefault(
+                (record["name"].lower(), record["type"]), []
+            ).append(record)
+
+        patches = []
+        for wanted in wanted_records:
+            records = existing_records.get((wanted["fqdn"], wanted["type"]), [])
+            if not records:
+                error_and_exit(
+                    f"DNS record {wanted['type']} {wanted['fqdn']} not found in zone {zone_id}."
+                )
+            # Like in single mode, only one record per name and type is updated
+            if len(records) > 1:
+                error_and_exit(
+                    f"Found {len(records)} {wanted['type']} records for {wanted['fqdn']} in zone {zone_id}, expected one."
+                )
+            record = records[0]
+            if record["content"] == wanted["value"]:
+                typer.secho(
+                    f"{wanted['type']} record for {wanted['fqdn']} already matches.",
+                    fg=typer.colors.YELLOW,
+                )
+                continue
+            typer.secho(
+                f"Updating {wanted['type']} record for {wanted['fqdn']} with {wanted['value']}.",
+                fg=typer.colors.YELLOW,
+            )
+            patches.append({"id": record["id"], "content": wanted["value"]})
+
+        if not patches:
+            continue
+        if not batch_update_dns_records(zone_id, patches, api_token):
+            for patch in patches:
+                update_dns_record(zone_id, patch["id"], patch["content"], api_token)
+
+
 # Main script
 def main(
+    api_token: Annotated[
+        str,
+        typer.Option(
+            "--api-token",
+            "-t",
+            envvar="SCRIPT_API_TOKEN",
+            help="i.e.: 1234567890abcdef1234567890abcdef",
+        ),
+    ],
     fqdn: Annotated[
         str,
         typer.Option(
@@ -64,7 +290,7 @@ def main(
             envvar="SCRIPT_FQDN",
             help="i.e.: www.example.com",
         ),
-    ],
+    ] = "",
     zone_id: Annotated[
         str,
         typer.Option(
@@ -73,16 +299,7 @@ def main(
             envvar="SCRIPT_ZONE_ID",
             help="i.e.: 1234567890abcdef1234567890abcdef",
         ),
-    ],
-    api_token: Annotated[
-        str,
-        typer.Option(
-            "--api-token",
-            "-t",
-            envvar="SCRIPT_API_TOKEN",
-            help="i.e.: 1234567890abcdef1234567890abcdef",
-        ),
-    ],
+    ] = "",
     value: Annotated[
         str,
         typer.Option(
@@ -90,7 +307,6 @@ def main(
             "-v",
             envvar="SCRIPT_VALUE",
             help="i.e.: 192.168.1.1",
-            callback=value_callback,
         ),
     ] = "",
     record_type: Annotated[
@@ -103,22 +319,36 @@ def main(
             case_sensitive=False,
         ),
     ] = "A",
+    manifest_path: Annotated[
+        str,
+        typer.Option(
+            "--manifest",
+            "-m",
+            envvar="SCRIPT_MANIFEST",
+            help="i.e.: /tmp/records.json",
+        ),
+    ] = "",
 ) -> None:
     """
     Update a DNS record.
     """
+    if manifest_path:
+        sync_dns_records(manifest_path, api_token)
+        typer.secho("DNS records updated successfully.", fg=typer.colors.GREEN)
+        return
+    if not fqdn or not zone_id:
+        error_and_exit("--fqdn and --zone-id are required without --manifest.")
+    value = value_callback(value)
+
     record_id = record_content = ""
     endpoint_url = DNS_BASE_URL + f"/zones/{zone_id}/dns_records"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer " + api_token,
-    }
+    headers = get_headers(api_token)
     params = {
         "name": fqdn,
         "type": record_type,
     }
     try:
-        response = requests.get(url=endpoint_url, headers=headers, params=params)
+        response = get_session().get(url=endpoint_url, headers=headers, params=params)
         validate_http_status_code(response)
         validate_json_key("success", response)
         json_data = response.json()
@@ -139,21 +369,7 @@ def main(
             f"DNS record does not match the current IP address. Updating {record_type} record for {fqdn} with {value}.",
             fg=typer.colors.YELLOW,
         )
-        endpoint_url = DNS_BASE_URL + f"/zones/{zone_id}/dns_records/{record_id}"
-        payload = {"content": value}
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer " + api_token,
-        }
-        try:
-            response = requests.patch(url=endpoint_url, json=payload, headers=headers)
-            validate_http_status_code(response)
-            validate_json_key("success", response)
-            json_data = response.json()
-            if not json_data["success"]:
-                error_and_exit("DNS API call failed.")
-        except OSError:
-            error_and_exit("DNS API call could not be completed.")
+        update_dns_record(zone_id, record_id, value, api_token)
 
     typer.secho("DNS record updated successfully.", fg=typer.colors.GREEN)
 
@@ -3,19 +3,45 @@
 # dependencies = [
 #     "typer",
 #     "requests",
+#     "pyyaml",
 # ]
 # ///
 
+from functools import cache
 from pathlib import Path
 from typing_extensions import Annotated
+import hashlib
+import os
+import threading
+import time
 import typer
-import re
 import json
 
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Optional
 
+DEVTO_API_URL = "https://dev.to/api/articles"
+DEVTO_MANIFEST_FILE = ".devto-manifest.json"
+DEVTO_FIELDS = (
+    "title",
+    "description",
+    "series",
+    "canonical_url",
+    "main_image",
+    "organization_id",
+)
+POST_CHUNK_SIZE = 64 * 1024
+HTTP_TIMEOUT = float(os.environ.get("SCRIPT_HTTP_TIMEOUT", "30"))
+HTTP_POOL_SIZE = int(os.environ.get("SCRIPT_HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.environ.get("SCRIPT_HTTP_RETRIES", "3"))
+RATE_LIMIT_ATTEMPTS = 5
+RATE_LIMIT_DEFAULT_DELAY = 30.0
+RATE_LIMIT_LOCK = threading.Lock()
+RATE_LIMIT_STATE = {"resume_at": 0.0}
+
 
 # Helper functions
 def error_and_exit(error_message: str | None = "An error has occurred.") -> None:
@@ -29,6 +55,101 @@ def error_and_exit(error_message: str | None = "An error has occurred.") -> None
     raise typer.Exit(code=1)
 
 
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that applies a default timeout to every request.
+    """
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = HTTP_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+@cache
+def get_session() -> requests.Session:
+    """
+    Helper to get a pooled HTTP session with keep-alive and retries.
+
+    HTTP 429 is left to send_devto_request, which pauses all workers at once.
+    """
+    retries = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def set_session_pool_size(pool_size: int) -> None:
+    """
+    Helper to grow the connection pool of the session to the number of workers.
+
+    Connections above the pool size are discarded after every request, so a
+    smaller pool would open a new connection for most requests.
+    """
+    if pool_size <= HTTP_POOL_SIZE:
+        return
+    session = get_session()
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=pool_size,
+        max_retries=session.get_adapter("https://").max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def get_retry_after(response: requests.models.Response) -> float:
+    """
+    Helper to read the Retry-After header as seconds or as an HTTP date.
+    """
+    from email.utils import parsedate_to_datetime
+
+    retry_after = response.headers.get("Retry-After", "")
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return RATE_LIMIT_DEFAULT_DELAY
+
+
+def send_devto_request(
+    method: str, endpoint_url: str, data: dict, headers: dict[str, str]
+) -> requests.models.Response:
+    """
+    Helper to send a request to dev.to, pausing every worker while rate limited.
+    """
+    for _ in range(RATE_LIMIT_ATTEMPTS):
+        with RATE_LIMIT_LOCK:
+            delay = RATE_LIMIT_STATE["resume_at"] - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        response = get_session().request(
+            method, endpoint_url, json=data, headers=headers
+        )
+        if response.status_code != 429:
+            break
+        with RATE_LIMIT_LOCK:
+            RATE_LIMIT_STATE["resume_at"] = max(
+                RATE_LIMIT_STATE["resume_at"],
+                time.monotonic() + get_retry_after(response),
+            )
+    return response
+
+
 def validate_http_status_code(response: requests.models.Response) -> None:
     """
     Helper validate and error on http status code.
@@ -46,17 +167,230 @@ def validate_json_key(json_key: str, response: requests.models.Response) -> None
         error_and_exit(f"JSON key {json_key} not found.")
 
 
+def parse_frontmatter_lines(lines: list[str]) -> dict:
+    """
+    Helper to parse frontmatter lines as YAML, falling back to plain key: value lines.
+    """
+    import yaml
+
+    try:
+        frontmatter = yaml.safe_load("".join(lines)) or {}
+        if isinstance(frontmatter, dict):
+            return frontmatter
+    except yaml.YAMLError:
+        pass
+
+    # Unquoted values such as "title: Part 1: Setup" are not valid YAML
+    frontmatter = {}
+    for line in lines:
+        key, separator, value = line.partition(":")
+        if separator and key.strip() and not key.startswith((" ", "\t", "#")):
+            frontmatter[key.strip()] = value.strip()
+    return frontmatter
+
+
+def parse_post(path: Path, publish: bool) -> dict:
+    """
+    Helper to read the frontmatter of a markdown post in a single pass.
+
+    Only the header is read, the body is loaded later with read_post_body.
+    """
+    if not path.exists():
+        error_and_exit(f"File not found: {path}")
+
+    publish_str = "true" if publish else "false"
+    post_hash = hashlib.sha256(publish_str.encode("utf-8"))
+    lines = []
+    with open(path, "rb") as f:
+        line = f.readline()
+        while line and not line.strip():
+            post_hash.update(line)
+            line = f.readline()
+        if line.strip() != b"---":
+            error_and_exit(f"Invalid post format: missing delimiters (---) in {path}")
+        post_hash.update(line)
+        for line in iter(f.readline, b""):
+            post_hash.update(line)
+            if line.strip() == b"---":
+                break
+            lines.append(line.decode("utf-8"))
+        else:
+            error_and_exit(f"Invalid post format: missing delimiters (---) in {path}")
+        body_offset = f.tell()
+        for chunk in iter(lambda: f.read(POST_CHUNK_SIZE), b""):
+            post_hash.update(chunk)
+
+    frontmatter = parse_frontmatter_lines(lines)
+    tags = frontmatter.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.strip("[]").split(",")
+
+    post = {
+        "path": path,
+        "body_offset": body_offset,
+        "publish": publish_str,
+        "hash": post_hash.hexdigest(),
+        "tags": [str(tag).strip() for tag in tags if str(tag).strip()],
+    }
+    # YAML types values such as dates, only organization_id is not a string
+    for field in DEVTO_FIELDS:
+        if frontmatter.get(field) is not None:
+            post[field] = frontmatter[field]
+            if field != "organization_id":
+                post[field] = str(post[field])
+    if "main_image" not in post and frontmatter.get("cover_image"):
+        post["main_image"] = str(frontmatter["cover_image"])
+    return post
+
+
+def read_post_body(post: dict) -> str:
+    """
+    Helper to read the body of a parsed post.
+    """
+    with open(post["path"], "rb") as f:
+        f.seek(post["body_offset"])
+        return f.read().decode("utf-8").strip()
+
+
+def publish_article(post: dict, api_token: str, article_id: int | None = None) -> dict:
+    """
+    Helper to create a dev.to article, or update it when an id is given.
+    """
+    # Create post data
+    article = {field: post[field] for field in DEVTO_FIELDS if field in post}
+    article.update(
+        {
+            "body_markdown": read_post_body(post),
+            "published": post["publish"],
+            "tags": post["tags"],
+        }
+    )
+    data = {"article": article}
+    headers = {
+        "Content-Type": "application/json",
+        "api-key": api_token,
+    }
+
+    if article_id is None:
+        response = send_devto_request("POST", DEVTO_API_URL, data, headers)
+    else:
+        response = send_devto_request(
+            "PUT", DEVTO_API_URL + f"/{article_id}", data, headers
+        )
+    response.raise_for_status()
+    json_data = response.json()
+    if not json_data.get("path"):
+        raise requests.exceptions.HTTPError(
+            "dev.to response has no article path.", response=response
+        )
+    return json_data
+
+
+def load_manifest(manifest_path: Path) -> dict[str, dict]:
+    """
+    Helper to load the manifest of already published posts.
+    """
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        error_and_exit(f"Manifest could not be loaded: {e}")
+    return {}
+
+
+def save_manifest(manifest_path: Path, manifest: dict[str, dict]) -> None:
+    """
+    Helper to atomically write the manifest of published posts.
+    """
+    temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def publish_directory(
+    directory: Path,
+    manifest_path: Path,
+    api_token: str,
+    publish: bool,
+    concurrency: int = 1,
+) -> None:
+    """
+    Helper to publish the new and changed posts of a directory tree.
+
+    Posts whose content hash matches the manifest are skipped without any API
+    call. The manifest is saved after every upload so an interrupted run
+    resumes with the posts that are still pending.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    manifest = load_manifest(manifest_path)
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+
+    # Parse and diff every post first, a malformed post stops before any upload
+    pending = []
+    for path in sorted(directory.rglob("*.md")):
+        post_key = path.relative_to(directory).as_posix()
+        post = parse_post(path, publish)
+        entry = manifest.get(post_key)
+        if entry and entry["hash"] == post["hash"]:
+            counts["unchanged"] += 1
+            continue
+        pending.append((post_key, post, entry["id"] if entry else None))
+
+    def record_upload(future) -> None:
+        post_key, post, article_id = futures.pop(future)
+        try:
+            json_data = future.result()
+        except requests.exceptions.RequestException as e:
+            counts["failed"] += 1
+            typer.secho(f" - {post_key}: failed ({e})", fg=typer.colors.RED)
+            return
+        manifest[post_key] = {
+            "hash": post["hash"],
+            "id": json_data.get("id", article_id),
+            "path": json_data["path"],
+        }
+        save_manifest(manifest_path, manifest)
+        action = "created" if article_id is None else "updated"
+        counts[action] += 1
+        typer.secho(
+            f" - {post_key}: {action} at https://dev.to{json_data['path']}",
+            fg=typer.colors.BLUE,
+        )
+
+    set_session_pool_size(concurrency)
+    executor = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+    futures = {}
+    try:
+        for post_key, post, article_id in pending:
+            future = executor.submit(publish_article, post, api_token, article_id)
+            futures[future] = (post_key, post, article_id)
+        for future in as_completed(list(futures)):
+            record_upload(future)
+    finally:
+        # On errors and Ctrl+C drop the queued uploads, wait for the running
+        # ones and checkpoint them so a rerun does not create duplicates
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in list(futures):
+            if future.cancelled():
+                futures.pop(future)
+            else:
+                record_upload(future)
+
+    summary = (
+        f"Posts created: {counts['created']}, updated: {counts['updated']}, "
+        f"unchanged: {counts['unchanged']}, failed: {counts['failed']}."
+    )
+    if counts["failed"]:
+        error_and_exit(summary)
+    typer.secho(summary, fg=typer.colors.GREEN)
+
+
 # Main script
 def main(
-    file: Annotated[
-        str,
-        typer.Option(
-            "--file",
-            "-f",
-            envvar="SCRIPT_FILE",
-            help="i.e.: $HOME/articles/my-post.md",
-        ),
-    ],
     api_token: Annotated[
         str,
         typer.Option(
@@ -66,6 +400,15 @@ def main(
             help="i.e.: 1234567890abcdef1234567890abcdef",
         ),
     ],
+    file: Annotated[
+        str,
+        typer.Option(
+            "--file",
+            "-f",
+            envvar="SCRIPT_FILE",
+            help="i.e.: $HOME/articles/my-post.md",
+        ),
+    ] = "",
     publish: Annotated[
         bool,
         typer.Option(
@@ -73,103 +416,58 @@ def main(
             "-p",
         ),
     ] = False,
+    directory: Annotated[
+        str,
+        typer.Option(
+            "--directory",
+            "-d",
+            envvar="SCRIPT_DIRECTORY",
+            help="i.e.: $HOME/articles",
+        ),
+    ] = "",
+    manifest: Annotated[
+        str,
+        typer.Option(
+            "--manifest",
+            "-m",
+            envvar="SCRIPT_MANIFEST",
+            help="i.e.: $HOME/articles/.devto-manifest.json",
+        ),
+    ] = "",
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-c",
+            envvar="SCRIPT_CONCURRENCY",
+            help="Number of posts uploaded in parallel",
+        ),
+    ] = 2,
 ) -> None:
     """
     Publish a post to dev.to.
     """
-    # Read the file
-    path = Path(file)
-    if not path.exists():
-        error_and_exit(f"File not found: {file}")
-
-    with open(path, "r", encoding="utf-8") as f:
-        text = f.read()
-
-    # Split by --- delimiters
-    parts = text.split("---", 2)
-    if len(parts) < 3:
-        error_and_exit("Invalid post format: missing delimiters (---)")
-
-    # parts[0] is empty (before first ---), parts[1] is frontmatter, parts[2] is content
-    frontmatter = parts[1].strip()
-    content = parts[2].strip()
-
-    # Convert publish var
-    if publish:
-        publish_str = "true"
-    else:
-        publish_str = "false"
-
-    # Parse frontmatter
-    result = {
-        "title": None,
-        "description": None,
-        "date": None,
-        "tags": [],
-        "content": content,
-        "publish": publish_str,
-    }
-
-    # Extract title
-    title_match = re.search(r"^title:\s*(.+)$", frontmatter, re.MULTILINE)
-    if title_match:
-        result["title"] = title_match.group(1).strip()
-
-    # Extract description
-    desc_match = re.search(r"^description:\s*(.+)$", frontmatter, re.MULTILINE)
-    if desc_match:
-        result["description"] = desc_match.group(1).strip()
-
-    # Extract date
-    date_match = re.search(r"^date:\s*(.+)$", frontmatter, re.MULTILINE)
-    if date_match:
-        result["date"] = date_match.group(1).strip()
-
-    # Extract tags (handles format: [tag1, tag2, tag3])
-    tags_match = re.search(r"^tags:\s*\[(.+?)\]", frontmatter, re.MULTILINE)
-    if tags_match:
-        tags_str = tags_match.group(1)
-        # Split by comma and clean up each tag
-        result["tags"] = [tag.strip() for tag in tags_str.split(",")]
-
-    # # Extract tags (handles format: [tag1, tag2, tag3])
-    # tags_match = re.search(r"^tags:\s*\[(.+?)\]", frontmatter, re.MULTILINE)
-    # if tags_match:
-    #     tags_str = tags_match.group(1)
-    #     # Split by comma, trim whitespace, and keep only purely alphanumeric tags
-    #     result["tags"] = [
-    #         tag
-    #         for tag in (t.strip() for t in tags_str.split(","))
-    #         if tag and re.fullmatch(r"[A-Za-z0-9]+", tag)
-    #     ]
-    # else:
-    #     result["tags"] = []
-
-    # Create post data
-    data = {
-        "article": {
-            "title": result["title"],
-            "body_markdown": result["content"],
-            "published": result["publish"],
-            "tags": result["tags"],
-        }
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": api_token,
-    }
+    if directory:
+        directory_path = Path(directory).expanduser()
+        if not directory_path.is_dir():
+            error_and_exit(f"Directory not found: {directory}")
+        manifest_path = (
+            Path(manifest).expanduser()
+            if manifest
+            else directory_path / DEVTO_MANIFEST_FILE
+        )
+        publish_directory(
+            directory_path, manifest_path, api_token, publish, concurrency
+        )
+        return
+    if not file:
+        error_and_exit("Either --file or --directory is required.")
 
+    post = parse_post(Path(file), publish)
     try:
-        response = requests.post(
-            "https://dev.to/api/articles", json=data, headers=headers
-        )
-        validate_http_status_code(response)
-        validate_json_key("path", response)
-        json_data = response.json()
-        if not json_data["path"]:
-            error_and_exit("HTTP request failed.")
-    except OSError:
-        error_and_exit("HTTP request could not be completed.")
+        json_data = publish_article(post, api_token)
+    except requests.exceptions.RequestException as e:
+        error_and_exit(f"HTTP request could not be completed. {e}")
 
     typer.secho(
         f"Post published at https://dev.to{json_data['path']}",
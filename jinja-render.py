@@ -4,12 +4,1017 @@
 #     "jinja2",
 #     "typer",
 #     "pyyaml",
+#     "tomli; python_version < '3.11'",
 # ]
 # ///
 
+import time
+
+SCRIPT_STARTED = time.perf_counter()
+
+from contextlib import contextmanager
+from functools import cache, partial
+from typing import Iterable, List
 from typing_extensions import Annotated
+import os
+import sys
 import typer
 
+IMPORTS_FINISHED = time.perf_counter()
+
+TEMPLATE_SUFFIX = ".j2"
+DATA_SUFFIXES = (".yml", ".yaml", ".json", ".toml")
+WATCH_DEBOUNCE = 0.05
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "jinja-render"
+)
+BENCHMARK_SIZES = [1000, 10000, 50000]
+BENCHMARK_REPEAT = int(os.environ.get("SCRIPT_BENCHMARK_REPEAT", 3))
+PROFILE_TIMINGS: dict[str, float] = {}
+
+
+# Helper functions
+def error_and_exit(error_message: str | None = "An error has occurred.") -> None:
+    """
+    Helper to output error code and exit application.
+    """
+    typer.secho(
+        error_message,
+        fg=typer.colors.RED,
+    )
+    raise typer.Exit(code=1)
+
+
+@contextmanager
+def profile_stage(stage: str):
+    """
+    Helper to add the wall time spent in a block to the profile of a stage.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        PROFILE_TIMINGS[stage] = PROFILE_TIMINGS.get(stage, 0.0) + elapsed
+
+
+def get_process_age(pid: str = "self") -> float | None:
+    """
+    Helper to get the seconds since a process started, only available on Linux.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def get_startup_timings() -> dict[str, float]:
+    """
+    Helper to split the time before main into uv, interpreter and import stages.
+
+    Process start times come from /proc with clock tick resolution, so the uv
+    and interpreter stages are only reported on Linux and are accurate to ~10ms.
+    """
+    timings = {}
+    script_age = time.perf_counter() - SCRIPT_STARTED
+    process_age = get_process_age()
+    if process_age is not None:
+        try:
+            with open("/proc/self/stat") as f:
+                parent_pid = f.read().rsplit(")", 1)[1].split()[1]
+            with open(f"/proc/{parent_pid}/comm") as f:
+                parent_name = f.read().strip()
+        except (OSError, IndexError):
+            parent_name = ""
+        parent_age = get_process_age(parent_pid) if parent_name == "uv" else None
+        if parent_age is not None:
+            timings["uv startup"] = max(parent_age - process_age, 0.0)
+        timings["interpreter startup"] = max(process_age - script_age, 0.0)
+    timings["imports"] = IMPORTS_FINISHED - SCRIPT_STARTED
+    return timings
+
+
+def get_peak_memory(children: bool = False) -> float | None:
+    """
+    Helper to get the peak resident memory in MB of this process or its children.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes while macOS reports bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def print_profile(workers: int = 1) -> None:
+    """
+    Helper to print the time spent per stage and the peak memory to stderr.
+    """
+    timings = get_startup_timings()
+    timings.update(PROFILE_TIMINGS)
+    total = sum(timings.values())
+    typer.secho("Profile:", fg=typer.colors.BLUE, err=True)
+    for stage, seconds in timings.items():
+        share = seconds / total * 100 if total else 0
+        typer.echo(f" - {stage}: {seconds * 1000:.1f} ms ({share:.0f}%)", err=True)
+    if workers > 1:
+        typer.echo(" - stages after imports are summed over all workers", err=True)
+
+    peak_memory = get_peak_memory()
+    if peak_memory is not None:
+        typer.echo(f" - peak memory: {peak_memory:.1f} MB", err=True)
+        if workers > 1:
+            peak_memory = get_peak_memory(children=True)
+            typer.echo(f" - peak worker memory: {peak_memory:.1f} MB", err=True)
+
+
+def get_bytecode_cache(cache_dir: str):
+    """
+    Helper to get an on-disk bytecode cache keyed by template path, mtime and Jinja version.
+    """
+    import jinja2
+    from jinja2 import FileSystemBytecodeCache
+
+    class MtimeBytecodeCache(FileSystemBytecodeCache):
+        def get_cache_key(self, name, filename=None):
+            mtime = os.stat(filename).st_mtime_ns if filename else 0
+            return super().get_cache_key(f"{name}|{mtime}", filename)
+
+    directory = os.path.join(cache_dir, f"jinja2-{jinja2.__version__}")
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    except OSError as e:
+        typer.secho(
+            f"Rendering without bytecode cache: {e}", fg=typer.colors.YELLOW, err=True
+        )
+        return None
+    return MtimeBytecodeCache(directory)
+
+
+def evict_bytecode_cache(cache_dir: str, max_size: int) -> None:
+    """
+    Helper to delete the least recently used cache files above max_size bytes.
+    """
+    cache_files = []
+    for root, dirs, files in os.walk(cache_dir):
+        # Dependency state of incremental renders is not part of the bytecode cache
+        dirs[:] = [directory for directory in dirs if directory != "state"]
+        for file in files:
+            file_path = os.path.join(root, file)
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                continue
+            cache_files.append((file_stat.st_atime, file_stat.st_size, file_path))
+
+    total_size = sum(size for _, size, _ in cache_files)
+    for _, size, file_path in sorted(cache_files):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue
+        total_size -= size
+
+
+@cache
+def get_environment(template_dir: str, cache_dir: str = ""):
+    """
+    Helper to get one Jinja environment, and its template cache, per directory.
+
+    The environment records the file of every template it hands out, including
+    the ones pulled in by include, extends and import while rendering.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    class TrackingEnvironment(Environment):
+        def get_template(self, *args, **kwargs):
+            template = super().get_template(*args, **kwargs)
+            self.loaded_templates.add(template.filename)
+            return template
+
+        def select_template(self, *args, **kwargs):
+            template = super().select_template(*args, **kwargs)
+            self.loaded_templates.add(template.filename)
+            return template
+
+    bytecode_cache = get_bytecode_cache(cache_dir) if cache_dir else None
+    env = TrackingEnvironment(
+        loader=FileSystemLoader(template_dir), bytecode_cache=bytecode_cache
+    )
+    env.loaded_templates = set()
+    return env
+
+
+def parse_data_file(data_path: str) -> dict:
+    """
+    Helper to parse a YAML, JSON or TOML data file.
+    """
+    if data_path.endswith(".json"):
+        import json
+
+        with open(data_path, "rb") as f:
+            return json.load(f) or {}
+    if data_path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+
+        with open(data_path, "rb") as f:
+            return tomllib.load(f)
+
+    import yaml
+
+    # The libyaml based loader is much faster when PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(data_path, "rb") as f:
+        return yaml.load(f, Loader=loader) or {}
+
+
+@cache
+def get_snapshot_dir(cache_dir: str) -> str:
+    """
+    Helper to get the data snapshot directory, empty when it cannot be used safely.
+    """
+    snapshot_dir = os.path.join(cache_dir, "data")
+    try:
+        os.makedirs(snapshot_dir, mode=0o700, exist_ok=True)
+        directory_stat = os.stat(snapshot_dir)
+    except OSError as e:
+        typer.secho(
+            f"Loading data without snapshots: {e}", fg=typer.colors.YELLOW, err=True
+        )
+        return ""
+    if directory_stat.st_uid != os.getuid() or directory_stat.st_mode & 0o077:
+        typer.secho(
+            f"Ignoring data snapshots with unsafe permissions: {snapshot_dir}",
+            fg=typer.colors.YELLOW,
+            err=True,
+        )
+        return ""
+    return snapshot_dir
+
+
+@cache
+def load_data_file(data_path: str, cache_dir: str = "") -> dict:
+    """
+    Helper to load a data file once per process.
+
+    Parsed data is kept as a pickle snapshot keyed by the file hash and suffix, so
+    later runs against the same file skip parsing. Unpickling can run code,
+    so snapshots are only used when only the current user can write them.
+    Raises ValueError for unreadable data, this also runs in worker processes.
+    """
+    import pickle
+
+    snapshot_path = ""
+    snapshot_dir = get_snapshot_dir(cache_dir) if cache_dir else ""
+    if snapshot_dir:
+        try:
+            # The suffix picks the parser, the same bytes can parse differently
+            suffix = os.path.splitext(data_path)[1].lower()
+            snapshot_path = os.path.join(
+                snapshot_dir, f"{hash_file(data_path)}{suffix}.pickle"
+            )
+            with open(snapshot_path, "rb") as f:
+                file_stat = os.fstat(f.fileno())
+                if file_stat.st_uid == os.getuid() and not file_stat.st_mode & 0o077:
+                    return pickle.load(f)
+            typer.secho(
+                f"Ignoring data snapshot with unsafe permissions: {snapshot_path}",
+                fg=typer.colors.YELLOW,
+                err=True,
+            )
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+    try:
+        vars_data = parse_data_file(data_path)
+    except Exception as e:
+        # Parser errors differ per format and the parsers are imported lazily
+        raise ValueError(f"Data file {data_path} could not be loaded: {e}") from e
+    if not isinstance(vars_data, dict):
+        raise ValueError(f"Data file {data_path} must contain a mapping.")
+
+    if snapshot_path:
+        temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(
+                os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb"
+            ) as f:
+                pickle.dump(vars_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, snapshot_path)
+        except OSError:
+            # The snapshot only saves parsing next time, rendering goes on
+            pass
+    return vars_data
+
+
+def merge_data(base: dict, override: dict) -> dict:
+    """
+    Helper to deep merge two mappings, values of override win and lists are replaced.
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_data(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+@cache
+def load_data(data_paths: tuple[str, ...], cache_dir: str = "") -> dict:
+    """
+    Helper to load and merge data files in order, later files win.
+    """
+    vars_data: dict = {}
+    for data_path in data_paths:
+        vars_data = merge_data(vars_data, load_data_file(data_path, cache_dir))
+    return vars_data
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Helper to get the sha256 of a file, empty when the file does not exist.
+    """
+    import hashlib
+
+    file_hash = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                file_hash.update(chunk)
+    except OSError:
+        return ""
+    return file_hash.hexdigest()
+
+
+def get_state_path(cache_dir: str, output_path: str) -> str:
+    """
+    Helper to get the file holding the dependency hashes of an output.
+    """
+    import hashlib
+
+    output_key = hashlib.sha1(os.path.abspath(output_path).encode("utf-8"))
+    return os.path.join(cache_dir, "state", output_key.hexdigest() + ".json")
+
+
+def read_state(state_path: str) -> dict:
+    """
+    Helper to read the dependency hashes of an output, empty when missing.
+    """
+    import json
+
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_job_identity(template_path: str, data_paths: tuple[str, ...]) -> dict:
+    """
+    Helper to describe which template and ordered data files produce an output.
+    """
+    return {
+        "template": os.path.abspath(template_path),
+        "data": [os.path.abspath(data_path) for data_path in data_paths],
+    }
+
+
+def is_output_up_to_date(state: dict, output_path: str, job: dict) -> bool:
+    """
+    Helper to check that an output, its job and all of its dependencies are unchanged.
+
+    A different template or data files for the same output count as a change.
+    """
+    if not state or hash_file(output_path) != state.get("output"):
+        return False
+    if state.get("job") != job:
+        return False
+    return all(
+        hash_file(dependency) == file_hash
+        for dependency, file_hash in state.get("dependencies", {}).items()
+    )
+
+
+def write_output(
+    output_path: str,
+    chunks: Iterable[str],
+    keep_unchanged: bool = False,
+    buffer_size: int = -1,
+) -> bool:
+    """
+    Helper to write rendered chunks to an output file, or stdout for "-".
+
+    The chunks go to a temporary file that replaces the output once rendering
+    finished, so a failed render never leaves a truncated output behind. With
+    keep_unchanged an output with the same content is left untouched.
+    Returns False when the existing file was left untouched.
+    """
+    import hashlib
+
+    if output_path == "-":
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        sys.stdout.flush()
+        return True
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    # A symlinked output is replaced at the file it points to, so the link stays
+    real_path = os.path.realpath(output_path)
+    target_path = f"{real_path}.{os.getpid()}.tmp"
+    output_hash = hashlib.sha256()
+    f = open(target_path, "wb", buffering=buffer_size)
+    try:
+        with f:
+            for chunk in chunks:
+                chunk_bytes = chunk.encode("utf-8")
+                f.write(chunk_bytes)
+                output_hash.update(chunk_bytes)
+    except BaseException:
+        os.remove(target_path)
+        raise
+
+    if keep_unchanged and output_hash.hexdigest() == hash_file(output_path):
+        os.remove(target_path)
+        return False
+    # Keep the mode and owner of the existing output, like writing in place did
+    try:
+        output_stat = os.stat(real_path)
+    except FileNotFoundError:
+        output_stat = None
+    if output_stat:
+        os.chmod(target_path, output_stat.st_mode & 0o7777)
+        try:
+            os.chown(target_path, output_stat.st_uid, output_stat.st_gid)
+        except OSError:
+            pass
+    os.replace(target_path, real_path)
+    return True
+
+
+def render_template(
+    template_path: str,
+    data_paths: tuple[str, ...],
+    output_path: str,
+    cache_dir: str = "",
+    incremental: bool = False,
+    stream: bool = False,
+    buffer_size: int = -1,
+    template_root: str = "",
+) -> tuple[str, str, list[str]]:
+    """
+    Helper to render a template with merged data files into an output file.
+
+    In stream mode the output is written chunk by chunk while rendering.
+    With a template_root the template is loaded by its path relative to it,
+    so it can include partials from the whole template tree.
+    Returns the output path, whether it was rendered, unchanged or skipped
+    and the files it depends on.
+    """
+    import json
+
+    incremental = incremental and output_path != "-"
+    if incremental:
+        with profile_stage("incremental check"):
+            job = get_job_identity(template_path, data_paths)
+            state_path = get_state_path(cache_dir, output_path)
+            state = read_state(state_path)
+            up_to_date = is_output_up_to_date(state, output_path, job)
+        if up_to_date:
+            return output_path, "skipped", list(state["dependencies"])
+
+    # Setup Jinja and load the template
+    if template_root:
+        template_dir = template_root
+        template_file = os.path.relpath(template_path, template_root).replace(
+            os.sep, "/"
+        )
+    else:
+        template_dir = os.path.dirname(template_path) or "."
+        template_file = os.path.basename(template_path)
+    with profile_stage("template compile"):
+        env = get_environment(template_dir, cache_dir)
+        env.loaded_templates.clear()
+        jinja_template = env.get_template(template_file)
+
+    # Render template and write to output file, streaming does both at once
+    with profile_stage("data parse"):
+        vars_data = load_data(data_paths, cache_dir)
+    if stream:
+        with profile_stage("render + write"):
+            chunks = jinja_template.generate(**vars_data)
+            written = write_output(output_path, chunks, incremental, buffer_size)
+    else:
+        with profile_stage("render"):
+            chunks = [jinja_template.render(**vars_data)]
+        with profile_stage("write"):
+            written = write_output(output_path, chunks, incremental, buffer_size)
+
+    dependencies = sorted(
+        os.path.abspath(dependency)
+        for dependency in env.loaded_templates.union(data_paths)
+    )
+    if incremental:
+        with profile_stage("incremental check"):
+            state = {
+                "job": job,
+                "output": hash_file(output_path),
+                "dependencies": {
+                    dependency: hash_file(dependency) for dependency in dependencies
+                },
+            }
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            with open(state_path, "w") as f:
+                json.dump(state, f, indent=2)
+    return output_path, "rendered" if written else "unchanged", dependencies
+
+
+def render_jobs(
+    jobs: list[tuple[str, tuple[str, ...], str]], **render_options
+) -> list[tuple[str, str, list[str]]]:
+    """
+    Helper to render a list of (template, data, output) jobs in one process.
+
+    Template and data errors fail only their own job, its status holds the error.
+    """
+    from jinja2 import TemplateError
+
+    outputs = []
+    for job in jobs:
+        try:
+            outputs.append(render_template(*job, **render_options))
+        except TemplateError as e:
+            outputs.append((job[2], f"failed, {type(e).__name__}: {e}", []))
+        except ValueError as e:
+            outputs.append((job[2], f"failed, {e}", []))
+    return outputs
+
+
+def render_profiled_jobs(
+    jobs: list[tuple[str, tuple[str, ...], str]], **render_options
+) -> tuple[list[tuple[str, str, list[str]]], dict[str, float]]:
+    """
+    Helper to render a list of jobs in a worker and return the stage timings with it.
+    """
+    PROFILE_TIMINGS.clear()
+    return render_jobs(jobs, **render_options), dict(PROFILE_TIMINGS)
+
+
+def load_batch_manifest(manifest_path: str) -> list[tuple[str, tuple[str, ...], str]]:
+    """
+    Helper to load a YAML list of template, data and output entries.
+
+    data is a path or a list of paths merged in order. Relative paths are
+    resolved from the directory of the manifest.
+    """
+    import yaml
+
+    base_dir = os.path.dirname(manifest_path)
+    try:
+        with open(manifest_path) as f:
+            entries = yaml.safe_load(f) or []
+    except (OSError, yaml.YAMLError) as e:
+        error_and_exit(f"Manifest could not be loaded: {e}")
+
+    jobs = []
+    for entry in entries:
+        if not all(key in entry for key in ("template", "data", "output")):
+            error_and_exit(f"Manifest entry needs template, data and output: {entry}")
+        data_paths = entry["data"]
+        if isinstance(data_paths, str):
+            data_paths = [data_paths]
+        jobs.append(
+            (
+                os.path.join(base_dir, os.path.expanduser(entry["template"])),
+                tuple(
+                    os.path.join(base_dir, os.path.expanduser(data_path))
+                    for data_path in data_paths
+                ),
+                os.path.join(base_dir, os.path.expanduser(entry["output"])),
+            )
+        )
+    return jobs
+
+
+def get_batch_jobs(
+    template_dir: str, data_dir: str, output_dir: str
+) -> list[tuple[str, tuple[str, ...], str]]:
+    """
+    Helper to pair every template of a directory with every data file of another.
+
+    Outputs are written to <output_dir>/<data name>/<template path without .j2>.
+    Templates starting with an underscore are treated as partials and skipped.
+    """
+    templates = []
+    for root, _, files in os.walk(template_dir):
+        for file in files:
+            if file.endswith(TEMPLATE_SUFFIX) and not file.startswith("_"):
+                templates.append(os.path.join(root, file))
+    data_files = [
+        os.path.join(data_dir, file)
+        for file in os.listdir(data_dir)
+        if file.endswith(DATA_SUFFIXES)
+    ]
+
+    jobs = []
+    for template_path in sorted(templates):
+        output_name = os.path.relpath(template_path, template_dir)[
+            : -len(TEMPLATE_SUFFIX)
+        ]
+        for data_path in sorted(data_files):
+            data_name = os.path.splitext(os.path.basename(data_path))[0]
+            jobs.append(
+                (
+                    template_path,
+                    (data_path,),
+                    os.path.join(output_dir, data_name, output_name),
+                )
+            )
+    return jobs
+
+
+def render_batch(
+    jobs: list[tuple[str, tuple[str, ...], str]], workers: int, **render_options
+) -> None:
+    """
+    Helper to render all jobs in this process or spread over a process pool.
+
+    Jobs are sorted by template so every worker compiles as few templates as possible.
+    """
+    jobs = sorted(jobs)
+    if workers <= 1 or len(jobs) <= 1:
+        outputs = render_jobs(jobs, **render_options)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunk_size = -(-len(jobs) // workers)
+        chunks = [
+            jobs[index : index + chunk_size]
+            for index in range(0, len(jobs), chunk_size)
+        ]
+        outputs = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_outputs, timings in executor.map(
+                partial(render_profiled_jobs, **render_options),
+                chunks,
+            ):
+                outputs.extend(chunk_outputs)
+                for stage, seconds in timings.items():
+                    PROFILE_TIMINGS[stage] = PROFILE_TIMINGS.get(stage, 0.0) + seconds
+    failed = 0
+    for output, status, _ in outputs:
+        if status.startswith("failed"):
+            failed += 1
+            typer.secho(f" - {output} ({status})", fg=typer.colors.RED)
+        else:
+            typer.echo(f" - {output} ({status})")
+    if failed:
+        error_and_exit(f"{failed} of {len(jobs)} templates failed to render.")
+
+
+class FileWatcher:
+    """
+    Wait for file changes with inotify on Linux, polling file mtimes elsewhere.
+    """
+
+    # IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    INOTIFY_MASK = 0x008 | 0x080 | 0x100 | 0x200
+
+    def __init__(self, poll_interval: float) -> None:
+        import ctypes
+        import ctypes.util
+
+        self.poll_interval = poll_interval
+        self.mtimes: dict[str, int] = {}
+        self.watched_dirs: dict[int, str] = {}
+        self.fd = -1
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self.fd = self.libc.inotify_init()
+        except (OSError, AttributeError, TypeError):
+            self.fd = -1
+
+    def get_mtimes(self, paths: set[str]) -> dict[str, int]:
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = 0
+        return mtimes
+
+    def wait(self, paths: set[str]) -> set[str]:
+        """
+        Block until at least one of the paths changes and return the changed ones.
+        """
+        if self.fd < 0:
+            return self.poll(paths)
+        import select
+        import struct
+
+        for directory in {os.path.dirname(path) for path in paths}:
+            if directory in self.watched_dirs.values():
+                continue
+            watch_id = self.libc.inotify_add_watch(
+                self.fd, directory.encode(), self.INOTIFY_MASK
+            )
+            if watch_id >= 0:
+                self.watched_dirs[watch_id] = directory
+
+        changed: set[str] = set()
+        timeout = None
+        while True:
+            # Keep reading briefly after the first event to batch editor saves
+            readable, _, _ = select.select([self.fd], [], [], timeout)
+            if not readable:
+                if changed:
+                    return changed
+                continue
+            events = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(events):
+                watch_id, _, _, name_length = struct.unpack_from("iIII", events, offset)
+                offset += 16
+                name = events[offset : offset + name_length].rstrip(b"\0").decode()
+                offset += name_length
+                path = os.path.join(self.watched_dirs.get(watch_id, ""), name)
+                if path in paths:
+                    changed.add(path)
+            timeout = WATCH_DEBOUNCE
+
+    def poll(self, paths: set[str]) -> set[str]:
+        """
+        Compare file mtimes every poll interval until one of the paths changes.
+        """
+        for path, mtime in self.get_mtimes(paths - self.mtimes.keys()).items():
+            self.mtimes[path] = mtime
+        while True:
+            time.sleep(self.poll_interval)
+            mtimes = self.get_mtimes(paths)
+            changed = {path for path in paths if mtimes[path] != self.mtimes[path]}
+            self.mtimes.update(mtimes)
+            if changed:
+                return changed
+
+
+def watch_jobs(
+    jobs: list[tuple[str, tuple[str, ...], str]],
+    poll_interval: float,
+    **render_options,
+) -> None:
+    """
+    Helper to keep one warm process rendering the outputs affected by file changes.
+    """
+    from jinja2 import TemplateError
+
+    job_dependencies = {}
+    for job in jobs:
+        try:
+            output, status, dependencies = render_template(*job, **render_options)
+        except TemplateError as e:
+            error_and_exit(f"Template could not be rendered, {type(e).__name__}: {e}")
+        except ValueError as e:
+            error_and_exit(str(e))
+        job_dependencies[job] = set(dependencies)
+        typer.echo(f" - {output} ({status})")
+
+    watcher = FileWatcher(poll_interval)
+    mode = "inotify" if watcher.fd >= 0 else "polling"
+    typer.secho(
+        f"Watching {len(jobs)} outputs for changes ({mode}), press Ctrl+C to stop.",
+        fg=typer.colors.BLUE,
+        err=True,
+    )
+    try:
+        while True:
+            watched_paths = set().union(*job_dependencies.values())
+            changed = watcher.wait(watched_paths)
+            started = time.perf_counter()
+            # Data files are cached per process, drop them when any data changed
+            load_data.cache_clear()
+            load_data_file.cache_clear()
+            for job, dependencies in job_dependencies.items():
+                if not dependencies & changed:
+                    continue
+                try:
+                    output, status, new_dependencies = render_template(
+                        *job, **render_options
+                    )
+                except Exception as e:
+                    typer.secho(f" - {job[2]} failed: {e}", fg=typer.colors.RED)
+                    continue
+                job_dependencies[job] = set(new_dependencies)
+                elapsed = (time.perf_counter() - started) * 1000
+                typer.echo(f" - {output} ({status} in {elapsed:.0f} ms)")
+    except KeyboardInterrupt:
+        typer.secho("Stopped watching.", fg=typer.colors.GREEN, err=True)
+
+
+def get_benchmark_cases(size: int) -> dict[str, tuple[dict[str, str], dict]]:
+    """
+    Helper to build synthetic templates and data for one benchmark size.
+
+    Every case renders the same items through plain loops, macros or includes,
+    the macro case also grows its template with the size to stress compiling.
+    """
+    items = [
+        {
+            "name": f"item-{index}",
+            "value": index * 7 % 1000,
+            "enabled": index % 3 != 0,
+            "tags": [f"tag-{index % 5}", f"group-{index % 11}"],
+        }
+        for index in range(size)
+    ]
+    item_row = (
+        "{{ item.name }}: {{ item.value }}"
+        "{% if item.enabled %} [{{ item.tags | join(', ') }}]{% endif %}\n"
+    )
+    macro_count = max(size // 100, 1)
+    macros = "".join(
+        f"{{% macro row_{index}(item) %}}{index}. {item_row}{{% endmacro %}}\n"
+        for index in range(macro_count)
+    )
+    macro_names = ", ".join(f"row_{index}" for index in range(macro_count))
+    return {
+        "loops": (
+            {"main.j2": f"{{% for item in items %}}{item_row}{{% endfor %}}"},
+            {"items": items},
+        ),
+        "macros": (
+            {
+                "main.j2": macros
+                + f"{{% set rows = [{macro_names}] %}}"
+                + "{% for item in items %}"
+                + "{{ rows[loop.index0 % rows | length](item) }}"
+                + "{% endfor %}"
+            },
+            {"items": items},
+        ),
+        "includes": (
+            {
+                "main.j2": '{% for item in items %}{% include "_item.j2" %}{% endfor %}',
+                "_item.j2": item_row,
+            },
+            {"items": items},
+        ),
+    }
+
+
+def run_benchmark_case(
+    case_dir: str, templates: dict[str, str], data: dict, repeat: int
+) -> dict[str, float]:
+    """
+    Helper to time the data parse, compile, render and write stages of one case.
+
+    Every stage keeps the fastest of the repeated runs, peak memory is traced
+    on a separate run so tracing does not slow down the timings.
+    """
+    import tracemalloc
+    import yaml
+
+    os.makedirs(case_dir)
+    for template_file, source in templates.items():
+        with open(os.path.join(case_dir, template_file), "w") as f:
+            f.write(source)
+    data_path = os.path.join(case_dir, "data.yml")
+    with open(data_path, "w") as f:
+        yaml.dump(data, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper))
+    output_path = os.path.join(case_dir, "output")
+
+    def run_stages() -> dict[str, float]:
+        timings = {}
+        started = time.perf_counter()
+        vars_data = parse_data_file(data_path)
+        timings["data parse"] = time.perf_counter() - started
+
+        # A fresh environment per run so nothing is served from a cache
+        started = time.perf_counter()
+        env = get_environment.__wrapped__(case_dir)
+        jinja_template = env.get_template("main.j2")
+        for template_file in templates:
+            env.get_template(template_file)
+        timings["template compile"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        output = jinja_template.render(**vars_data)
+        timings["render"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        write_output(output_path, [output])
+        timings["write"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        write_output(output_path, jinja_template.generate(**vars_data), False, 1 << 20)
+        timings["stream"] = time.perf_counter() - started
+        return timings
+
+    runs = [run_stages() for _ in range(max(repeat, 1))]
+    result = {stage: min(run[stage] for run in runs) for stage in runs[0]}
+
+    tracemalloc.start()
+    vars_data = parse_data_file(data_path)
+    env = get_environment.__wrapped__(case_dir)
+    write_output(output_path, [env.get_template("main.j2").render(**vars_data)])
+    result["peak memory"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    result["output size"] = os.path.getsize(output_path) / (1024 * 1024)
+    return result
+
+
+def run_benchmark(
+    sizes: list[int], repeat: int, output_path: str = "", baseline_path: str = ""
+) -> None:
+    """
+    Helper to run the synthetic benchmark suite and compare it with a baseline.
+
+    Results can be saved as JSON to be used as the baseline of a later run,
+    so a slower Jinja, PyYAML or script release shows up as a regression.
+    """
+    import json
+    import platform
+    import shutil
+    import tempfile
+    import jinja2
+    import yaml
+
+    baseline = {}
+    if baseline_path:
+        try:
+            with open(baseline_path) as f:
+                baseline = {
+                    (result["case"], result["size"]): result
+                    for result in json.load(f)["results"]
+                }
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            error_and_exit(f"Benchmark baseline {baseline_path} is invalid: {e}")
+
+    stages = ["data parse", "template compile", "render", "write", "stream"]
+    typer.secho(
+        f"Benchmark, best of {repeat} runs in ms:",
+        fg=typer.colors.BLUE,
+    )
+    typer.echo(
+        f"{'case':<10}{'size':>8}"
+        + "".join(f"{stage.split()[-1]:>10}" for stage in stages)
+        + f"{'peak MB':>10}{'change':>10}"
+    )
+    results = []
+    benchmark_dir = tempfile.mkdtemp(prefix="jinja-render-benchmark-")
+    try:
+        for size in sizes:
+            for case, (templates, data) in get_benchmark_cases(size).items():
+                case_dir = os.path.join(benchmark_dir, f"{case}-{size}")
+                result = run_benchmark_case(case_dir, templates, data, repeat)
+                result = {"case": case, "size": size, **result}
+                results.append(result)
+
+                change = ""
+                if (case, size) in baseline:
+                    before = sum(
+                        baseline[(case, size)].get(stage, 0) for stage in stages
+                    )
+                    after = sum(result[stage] for stage in stages)
+                    if before:
+                        change = f"{(after - before) / before * 100:+.0f}%"
+                typer.echo(
+                    f"{case:<10}{size:>8}"
+                    + "".join(f"{result[stage] * 1000:>10.1f}" for stage in stages)
+                    + f"{result['peak memory']:>10.1f}{change:>10}"
+                )
+    finally:
+        shutil.rmtree(benchmark_dir, ignore_errors=True)
+
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "jinja2": jinja2.__version__,
+                    "pyyaml": yaml.__version__,
+                    "libyaml": hasattr(yaml, "CSafeLoader"),
+                    "repeat": repeat,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        typer.secho(f"Benchmark results saved to {output_path}", fg=typer.colors.GREEN)
+
 
 # Main script
 def main(
@@ -22,15 +1027,15 @@ def main(
             help="i.e.: /tmp/template.yml.j2",
         ),
     ] = "template.j2",
-    data_path: Annotated[
-        str,
+    data_paths: Annotated[
+        List[str],
         typer.Option(
             "--data-path",
             "-d",
             envvar="SCRIPT_DATA",
-            help="i.e.: /tmp/data.yml",
+            help="YAML, JSON or TOML, repeat to deep merge, i.e.: /tmp/data.yml",
         ),
-    ] = "data.yml",
+    ] = ["data.yml"],
     output_path: Annotated[
         str,
         typer.Option(
@@ -40,35 +1045,205 @@ def main(
             help="i.e.: /tmp/output.yml",
         ),
     ] = "output.yml",
+    manifest_path: Annotated[
+        str,
+        typer.Option(
+            "--manifest",
+            "-m",
+            envvar="SCRIPT_MANIFEST",
+            help="YAML list of template, data and output, i.e.: /tmp/render.yml",
+        ),
+    ] = "",
+    template_dir: Annotated[
+        str,
+        typer.Option(
+            "--template-dir",
+            "-T",
+            envvar="SCRIPT_TEMPLATE_DIR",
+            help="i.e.: /tmp/templates",
+        ),
+    ] = "",
+    data_dir: Annotated[
+        str,
+        typer.Option(
+            "--data-dir",
+            "-D",
+            envvar="SCRIPT_DATA_DIR",
+            help="i.e.: /tmp/data",
+        ),
+    ] = "",
+    output_dir: Annotated[
+        str,
+        typer.Option(
+            "--output-dir",
+            "-O",
+            envvar="SCRIPT_OUTPUT_DIR",
+            help="i.e.: /tmp/output",
+        ),
+    ] = ".",
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            envvar="SCRIPT_WORKERS",
+            help="Number of processes used to render a batch",
+        ),
+    ] = 1,
+    cache_dir: Annotated[
+        str,
+        typer.Option(
+            "--cache-dir",
+            "-c",
+            envvar="SCRIPT_CACHE_DIR",
+            help="Bytecode cache directory, empty to disable",
+        ),
+    ] = CACHE_DIR,
+    cache_size: Annotated[
+        int,
+        typer.Option(
+            "--cache-size",
+            envvar="SCRIPT_CACHE_SIZE",
+            help="Maximum size of the bytecode cache in MB",
+        ),
+    ] = 64,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            "-i",
+            help="Skip outputs whose template, includes and data did not change",
+        ),
+    ] = False,
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream",
+            "-s",
+            help="Write the output while rendering to keep memory usage flat",
+        ),
+    ] = False,
+    buffer_size: Annotated[
+        int,
+        typer.Option(
+            "--buffer-size",
+            envvar="SCRIPT_BUFFER_SIZE",
+            help="Write buffer size in KB used by --stream",
+        ),
+    ] = 1024,
+    watch: Annotated[
+        bool,
+        typer.Option(
+            "--watch",
+            "-W",
+            help="Keep running and re-render the outputs affected by file changes",
+        ),
+    ] = False,
+    poll_interval: Annotated[
+        float,
+        typer.Option(
+            "--poll-interval",
+            envvar="SCRIPT_POLL_INTERVAL",
+            help="Seconds between checks when inotify is not available",
+        ),
+    ] = 0.5,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Print the time spent per stage and the peak memory",
+        ),
+    ] = False,
+    benchmark: Annotated[
+        bool,
+        typer.Option(
+            "--benchmark",
+            help="Run the synthetic loops, macros and includes benchmark suite",
+        ),
+    ] = False,
+    benchmark_sizes: Annotated[
+        List[int],
+        typer.Option(
+            "--benchmark-size",
+            envvar="SCRIPT_BENCHMARK_SIZE",
+            help="Number of items per benchmark case, repeat for more sizes",
+        ),
+    ] = BENCHMARK_SIZES,
+    benchmark_output: Annotated[
+        str,
+        typer.Option(
+            "--benchmark-output",
+            envvar="SCRIPT_BENCHMARK_OUTPUT",
+            help="Save the benchmark results as JSON, i.e.: /tmp/benchmark.json",
+        ),
+    ] = "",
+    benchmark_baseline: Annotated[
+        str,
+        typer.Option(
+            "--benchmark-baseline",
+            envvar="SCRIPT_BENCHMARK_BASELINE",
+            help="Compare with saved benchmark results, i.e.: /tmp/benchmark.json",
+        ),
+    ] = "",
 ) -> None:
     """
     Generate output file from template.
     """
-    import os
-    import yaml
-    from jinja2 import Environment, FileSystemLoader
-
-    # Setup Jinja and load the template
-    template_dir = os.path.dirname(template_path) or "."
-    template_file = os.path.basename(template_path)
-    env = Environment(loader=FileSystemLoader(template_dir))
-    jinja_template = env.get_template(template_file)
-
-    # Load YAML data
-    with open(data_path) as f:
-        vars_data = yaml.safe_load(f)
+    if benchmark:
+        run_benchmark(
+            benchmark_sizes, BENCHMARK_REPEAT, benchmark_output, benchmark_baseline
+        )
+        return
+    cache_dir = os.path.expanduser(cache_dir)
+    if incremental and not cache_dir:
+        error_and_exit("--incremental needs a --cache-dir to store dependencies.")
+    render_options = {
+        "cache_dir": cache_dir,
+        "incremental": incremental,
+        "stream": stream,
+        "buffer_size": buffer_size * 1024 if stream else -1,
+    }
+    batch = bool(manifest_path or template_dir)
+    if manifest_path:
+        jobs = load_batch_manifest(manifest_path)
+    elif template_dir:
+        if not data_dir:
+            error_and_exit("--data-dir is required with --template-dir.")
+        jobs = get_batch_jobs(template_dir, data_dir, output_dir)
+        render_options["template_root"] = template_dir
+    else:
+        jobs = [(template_path, tuple(data_paths), output_path)]
 
-    # Render template
-    rendered = jinja_template.render(**vars_data)
+    if watch:
+        watch_jobs(jobs, poll_interval, **render_options)
+        return
+    if batch:
+        render_batch(jobs, workers, **render_options)
+        message = f"{len(jobs)} templates rendered successfully."
+    else:
+        from jinja2 import TemplateError
 
-    # Write to output file
-    with open(output_path, "w") as f:
-        f.write(rendered)
+        try:
+            _, status, _ = render_template(*jobs[0], **render_options)
+        except TemplateError as e:
+            error_and_exit(f"Template could not be rendered, {type(e).__name__}: {e}")
+        except ValueError as e:
+            error_and_exit(str(e))
+        message = {
+            "rendered": "Template rendered successfully.",
+            "unchanged": "Template rendered successfully, output is unchanged.",
+            "skipped": "Template and data are unchanged, rendering skipped.",
+        }[status] + f" Output file: {output_path}"
+    if cache_dir:
+        evict_bytecode_cache(cache_dir, cache_size * 1024 * 1024)
 
     typer.secho(
-        f"Template rendered successfully. Output file: {output_path}",
+        message,
         fg=typer.colors.GREEN,
+        err=output_path == "-",
     )
+    if profile:
+        print_profile(workers if batch else 1)
 
 
 if __name__ == "__main__":
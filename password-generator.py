@@ -3,25 +3,280 @@
 # dependencies = [
 #     "typer",
 #     "bcrypt",
+#     "argon2-cffi",
 # ]
 # ///
 
+from functools import partial
+from typing import Iterator, Literal
 from typing_extensions import Annotated
+import os
 import typer
 
+PASSWORD_BATCH_SIZE = 1024
+HASH_ROUNDS = {"bcrypt": 12, "argon2id": 3, "scrypt": 15, "pbkdf2-sha256": 600000}
+HASH_SALT_SIZE = 16
+HASH_KEY_SIZE = 32
+ARGON2_PARALLELISM = 4
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+SCRYPT_MAX_ROUNDS = 20
+PBKDF2_MIN_ROUNDS = 1000
+
 
 # Helper functions
-def error_and_exit() -> None:
+def error_and_exit(error_message: str | None = "An error has occurred.") -> None:
     """
     Helper to output error code and exit application.
     """
     typer.secho(
-        "An error has occurred.",
+        error_message,
         fg=typer.colors.RED,
     )
     raise typer.Exit(code=1)
 
 
+def generate_passwords(count: int, length: int, characters: str) -> Iterator[str]:
+    """
+    Helper to generate passwords from os.urandom read in bulk.
+
+    Random bytes above the largest multiple of the alphabet size are rejected
+    so every character is equally likely, then the rest is mapped in one pass.
+    """
+    limit = 256 - 256 % len(characters)
+    table = bytes(ord(characters[byte % len(characters)]) for byte in range(256))
+    rejected = bytes(range(limit, 256))
+    while count > 0:
+        batch_count = min(count, PASSWORD_BATCH_SIZE)
+        needed = batch_count * length
+        buffer = bytearray()
+        while len(buffer) < needed:
+            # Read a bit more than needed to make up for the rejected bytes
+            missing = needed - len(buffer)
+            random_bytes = os.urandom(missing * 256 // limit + 16)
+            buffer += random_bytes.translate(table, rejected)
+        for index in range(batch_count):
+            yield buffer[index * length : (index + 1) * length].decode("ascii")
+        count -= batch_count
+
+
+def encode_base64(data: bytes) -> str:
+    """
+    Helper to encode bytes as unpadded base64, as used in PHC hash strings.
+    """
+    import base64
+
+    return base64.b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_base64(data: str) -> bytes:
+    """
+    Helper to decode unpadded base64 from PHC hash strings.
+    """
+    import base64
+
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def derive_key(password: bytes, salt: bytes, algorithm: str, rounds: int) -> bytes:
+    """
+    Helper to derive a key with the scrypt or PBKDF2-SHA256 functions of hashlib.
+    """
+    import hashlib
+
+    if algorithm == "scrypt":
+        block_memory = 128 * SCRYPT_BLOCK_SIZE * 2**rounds
+        return hashlib.scrypt(
+            password,
+            salt=salt,
+            n=2**rounds,
+            r=SCRYPT_BLOCK_SIZE,
+            p=SCRYPT_PARALLELISM,
+            maxmem=min(block_memory * 2 + 1024 * 1024, 2**31 - 1),
+            dklen=HASH_KEY_SIZE,
+        )
+    return hashlib.pbkdf2_hmac("sha256", password, salt, rounds, HASH_KEY_SIZE)
+
+
+def hash_password(
+    password: str,
+    algorithm: str = "bcrypt",
+    rounds: int = 12,
+    memory: int = 64,
+    verify: bool = True,
+) -> str:
+    """
+    Helper to hash a password and optionally verify the hash.
+
+    Rounds is the bcrypt cost, argon2id time cost, scrypt log2(N) or PBKDF2
+    iterations, memory in MB is only used by argon2id. scrypt and PBKDF2
+    hashes use the PHC string format, like bcrypt and argon2id do.
+    """
+    password_bytes = password.encode("utf-8")
+    if algorithm == "bcrypt":
+        import bcrypt
+
+        salt = bcrypt.gensalt(rounds=rounds)
+        hashed_password = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+    elif algorithm == "argon2id":
+        from argon2 import PasswordHasher
+
+        hashed_password = PasswordHasher(
+            time_cost=rounds,
+            memory_cost=memory * 1024,
+            parallelism=ARGON2_PARALLELISM,
+            hash_len=HASH_KEY_SIZE,
+            salt_len=HASH_SALT_SIZE,
+        ).hash(password_bytes)
+    else:
+        salt = os.urandom(HASH_SALT_SIZE)
+        key = derive_key(password_bytes, salt, algorithm, rounds)
+        if algorithm == "scrypt":
+            parameters = f"ln={rounds},r={SCRYPT_BLOCK_SIZE},p={SCRYPT_PARALLELISM}"
+        else:
+            parameters = f"i={rounds}"
+        hashed_password = (
+            f"${algorithm}${parameters}${encode_base64(salt)}${encode_base64(key)}"
+        )
+    if verify and not verify_password(password, hashed_password):
+        error_and_exit(f"The {algorithm} hash could not be verified.")
+    return hashed_password
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    """
+    Helper to check a password against a hash of any supported algorithm.
+    """
+    import hmac
+
+    password_bytes = password.encode("utf-8")
+    if hashed_password.startswith("$2"):
+        import bcrypt
+
+        return bcrypt.checkpw(password_bytes, hashed_password.encode("utf-8"))
+    if hashed_password.startswith("$argon2"):
+        from argon2 import PasswordHasher
+        from argon2.exceptions import VerificationError
+
+        try:
+            return PasswordHasher().verify(hashed_password, password_bytes)
+        except VerificationError:
+            return False
+
+    _, algorithm, parameters, salt, key = hashed_password.split("$")
+    parameters = dict(parameter.split("=") for parameter in parameters.split(","))
+    rounds = int(parameters["ln"] if algorithm == "scrypt" else parameters["i"])
+    derived_key = derive_key(password_bytes, decode_base64(salt), algorithm, rounds)
+    return hmac.compare_digest(derived_key, decode_base64(key))
+
+
+def time_hash(algorithm: str, rounds: int, memory: int = 64) -> float:
+    """
+    Helper to get the fastest of two hash runs in seconds.
+
+    Verifying costs the same as hashing, so this is the login latency.
+    """
+    import time
+
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        hash_password("calibration", algorithm, rounds, memory, verify=False)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def calibrate_hash(
+    algorithm: str, target: float, max_memory: int
+) -> tuple[int, int, float]:
+    """
+    Helper to find the highest cost of an algorithm within a latency and memory budget.
+
+    Costs are extrapolated from a cheap run and then confirmed by measuring.
+    Returns the rounds, the memory in MB and the measured seconds.
+    """
+    import math
+
+    memory = 0
+    if algorithm == "bcrypt":
+        # Every bcrypt round doubles the time
+        seconds = time_hash(algorithm, 8)
+        rounds = min(max(8 + int(math.log2(target / seconds)), 4), 31)
+        seconds = time_hash(algorithm, rounds)
+        while seconds > target and rounds > 4:
+            rounds -= 1
+            seconds = time_hash(algorithm, rounds)
+    elif algorithm == "pbkdf2-sha256":
+        # PBKDF2 time is linear in the iterations
+        seconds = time_hash(algorithm, 10000)
+        rounds = max(int(10000 * target / seconds) // 1000 * 1000, PBKDF2_MIN_ROUNDS)
+        seconds = time_hash(algorithm, rounds)
+    elif algorithm == "scrypt":
+        # scrypt memory and time both double with log2(N)
+        block_memory = 128 * SCRYPT_BLOCK_SIZE / (1024 * 1024)
+        rounds = min(
+            max(int(math.log2(max_memory / block_memory)), 1), SCRYPT_MAX_ROUNDS
+        )
+        seconds = time_hash(algorithm, rounds)
+        while seconds > target and rounds > 1:
+            rounds -= 1
+            seconds = time_hash(algorithm, rounds)
+        memory = math.ceil(block_memory * 2**rounds)
+    else:
+        # argon2id uses the whole memory budget and scales the passes over it,
+        # halving the memory when a single pass is already too slow
+        memory = max_memory
+        seconds = time_hash(algorithm, 1, memory)
+        while seconds > target and memory > 8:
+            memory //= 2
+            seconds = time_hash(algorithm, 1, memory)
+        rounds = max(int(target / seconds), 1)
+        seconds = time_hash(algorithm, rounds, memory)
+        while seconds > target and rounds > 1:
+            rounds -= 1
+            seconds = time_hash(algorithm, rounds, memory)
+    return rounds, memory, seconds
+
+
+def calibrate(target_ms: int, max_memory: int) -> None:
+    """
+    Helper to benchmark every algorithm and print the recommended parameters.
+    """
+    typer.secho(
+        f"Calibrating for {target_ms} ms per verification and {max_memory} MB:",
+        fg=typer.colors.BLUE,
+    )
+    for algorithm in HASH_ROUNDS:
+        rounds, memory, seconds = calibrate_hash(
+            algorithm, target_ms / 1000, max_memory
+        )
+        options = f"--hash {algorithm} --rounds {rounds}"
+        if algorithm == "argon2id":
+            options += f" --memory {memory}"
+        memory_usage = f", {memory} MB" if memory else ""
+        typer.echo(f" - {options} ({seconds * 1000:.0f} ms{memory_usage})")
+    typer.secho("Calibration completed successfully.", fg=typer.colors.GREEN)
+
+
+def hash_passwords(
+    passwords: Iterator[str], workers: int, **hash_options
+) -> Iterator[tuple[str, str]]:
+    """
+    Helper to hash passwords on a thread pool and yield them in order.
+
+    bcrypt, argon2 and hashlib release the GIL while hashing, so threads use
+    all cores without the cost of starting processes. Work is submitted one batch at a time to
+    keep memory flat for large counts.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import islice
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while batch := list(islice(passwords, PASSWORD_BATCH_SIZE)):
+            hashes = executor.map(partial(hash_password, **hash_options), batch)
+            yield from zip(batch, hashes)
+
+
 # Main script
 def main(
     length: Annotated[
@@ -41,28 +296,149 @@ def main(
             help="Include symbols in the password",
         ),
     ] = False,
+    count: Annotated[
+        int,
+        typer.Option(
+            "--count",
+            "-n",
+            envvar="SCRIPT_COUNT",
+            help="Number of passwords to generate",
+        ),
+    ] = 1,
+    output_format: Annotated[
+        Literal["text", "csv", "json"],
+        typer.Option(
+            "--format",
+            "-f",
+            envvar="SCRIPT_FORMAT",
+            help="Output format, csv and json are streamed one password per line",
+            case_sensitive=False,
+        ),
+    ] = "text",
+    algorithm: Annotated[
+        Literal["bcrypt", "argon2id", "scrypt", "pbkdf2-sha256"],
+        typer.Option(
+            "--hash",
+            "-H",
+            envvar="SCRIPT_HASH",
+            help="Algorithm used to hash the password",
+            case_sensitive=False,
+        ),
+    ] = "bcrypt",
+    rounds: Annotated[
+        int,
+        typer.Option(
+            "--rounds",
+            "-r",
+            envvar="SCRIPT_ROUNDS",
+            help="bcrypt cost, argon2id time cost, scrypt log2(N) or PBKDF2 iterations,"
+            " 0 for the algorithm default",
+            min=0,
+        ),
+    ] = 0,
+    memory: Annotated[
+        int,
+        typer.Option(
+            "--memory",
+            "-m",
+            envvar="SCRIPT_MEMORY",
+            help="Memory used by argon2id in MB",
+            min=8,
+        ),
+    ] = 64,
+    verify: Annotated[
+        bool,
+        typer.Option(
+            "--verify/--no-verify",
+            help="Check every hash against its password after hashing",
+        ),
+    ] = True,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            envvar="SCRIPT_WORKERS",
+            help="Number of threads used to hash passwords",
+        ),
+    ] = os.cpu_count()
+    or 1,
+    calibrate_hashes: Annotated[
+        bool,
+        typer.Option(
+            "--calibrate",
+            help="Benchmark every algorithm and recommend parameters instead",
+        ),
+    ] = False,
+    target_ms: Annotated[
+        int,
+        typer.Option(
+            "--target-ms",
+            envvar="SCRIPT_TARGET_MS",
+            help="Verification latency to calibrate for in ms",
+        ),
+    ] = 250,
+    max_memory: Annotated[
+        int,
+        typer.Option(
+            "--max-memory",
+            envvar="SCRIPT_MAX_MEMORY",
+            help="Memory budget per verification to calibrate for in MB",
+        ),
+    ] = 64,
 ) -> None:
     """
     Generate a random password.
     """
-    import secrets
+    import csv
+    import json
     import string
-    import bcrypt
+    import sys
 
+    if calibrate_hashes:
+        calibrate(target_ms, max_memory)
+        return
+    if length < 1 or count < 1:
+        error_and_exit("Length and count must be at least 1.")
+    algorithm = algorithm.lower()
+    rounds = rounds or HASH_ROUNDS[algorithm]
+    if algorithm == "bcrypt" and not 4 <= rounds <= 31:
+        error_and_exit("bcrypt rounds must be between 4 and 31.")
+    if algorithm == "scrypt" and not 1 <= rounds <= SCRYPT_MAX_ROUNDS:
+        # Every round doubles the memory, 20 already needs 1 GB per hash
+        error_and_exit(f"scrypt rounds must be between 1 and {SCRYPT_MAX_ROUNDS}.")
+    if algorithm == "pbkdf2-sha256" and rounds < PBKDF2_MIN_ROUNDS:
+        error_and_exit(f"PBKDF2 rounds must be at least {PBKDF2_MIN_ROUNDS}.")
     characters = string.ascii_letters + string.digits
     if symbols:
         characters += string.punctuation
-    password = "".join(secrets.choice(characters) for _ in range(length))
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    is_valid = bcrypt.checkpw(password.encode("utf-8"), hashed_password)
-    if not is_valid:
-        error_and_exit()
-    typer.secho(f"Password: {password}", fg=typer.colors.BLUE)
-    typer.secho(
-        f"Hashed password: {hashed_password.decode('utf-8')}", fg=typer.colors.BLUE
-    )
-    typer.secho("Password generated successfully.", fg=typer.colors.GREEN)
+
+    output_format = output_format.lower()
+    if output_format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["password", "hash"])
+    passwords = generate_passwords(count, length, characters)
+    for password, hashed_password in hash_passwords(
+        passwords,
+        max(workers, 1),
+        algorithm=algorithm,
+        rounds=rounds,
+        memory=memory,
+        verify=verify,
+    ):
+        if output_format == "csv":
+            writer.writerow([password, hashed_password])
+        elif output_format == "json":
+            typer.echo(json.dumps({"password": password, "hash": hashed_password}))
+        else:
+            typer.secho(f"Password: {password}", fg=typer.colors.BLUE)
+            typer.secho(f"Hashed password: {hashed_password}", fg=typer.colors.BLUE)
+        sys.stdout.flush()
+
+    message = "Password generated successfully."
+    if count > 1:
+        message = f"{count} passwords generated successfully."
+    typer.secho(message, fg=typer.colors.GREEN, err=output_format != "text")
 
 
 if __name__ == "__main__":
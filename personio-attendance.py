@@ -3,17 +3,74 @@
 # dependencies = [
 #     "typer",
 #     "requests",
+#     "pyyaml",
 # ]
 # ///
 
+from functools import cache
 from typing_extensions import Annotated
 from typing import Any
+import hashlib
+import json
+import os
+import threading
+import time
 import typer
 import requests
-from datetime import datetime, timedelta
-
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import date, datetime, timedelta
 
 PERSONIO_BASE_URL = "https://api.personio.de/v2"
+HTTP_TIMEOUT = float(os.environ.get("SCRIPT_HTTP_TIMEOUT", "30"))
+HTTP_POOL_SIZE = int(os.environ.get("SCRIPT_HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.environ.get("SCRIPT_HTTP_RETRIES", "3"))
+ATTENDANCE_PAGE_SIZE = 50
+DEFAULT_START_TIME = {
+    "MORNING": "08:30:00",
+    "AFTERNOON": "13:00:00",
+}
+DEFAULT_END_TIME = {
+    "MORNING": "12:30:00",
+    "AFTERNOON": "17:00:00",
+}
+TOKEN_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "personio-attendance",
+)
+TOKEN_EXPIRY_MARGIN = 60
+# Public holidays as (month, day) dates and days relative to Easter Sunday.
+# Regions inherit the holidays of their country, i.e. DE-BY includes DE.
+FIXED_HOLIDAYS = {
+    "DE": [(1, 1), (5, 1), (10, 3), (12, 25), (12, 26)],
+    "DE-BB": [(10, 31)],
+    "DE-BE": [(3, 8)],
+    "DE-BW": [(1, 6), (11, 1)],
+    "DE-BY": [(1, 6), (8, 15), (11, 1)],
+    "DE-HB": [(10, 31)],
+    "DE-HE": [],
+    "DE-HH": [(10, 31)],
+    "DE-MV": [(3, 8), (10, 31)],
+    "DE-NI": [(10, 31)],
+    "DE-NW": [(11, 1)],
+    "DE-RP": [(11, 1)],
+    "DE-SH": [(10, 31)],
+    "DE-SL": [(8, 15), (11, 1)],
+    "DE-SN": [(10, 31)],
+    "DE-ST": [(1, 6), (10, 31)],
+    "DE-TH": [(9, 20), (10, 31)],
+}
+EASTER_HOLIDAYS = {
+    "DE": [-2, 1, 39, 50],
+    "DE-BW": [60],
+    "DE-BY": [60],
+    "DE-HE": [60],
+    "DE-NW": [60],
+    "DE-RP": [60],
+    "DE-SL": [60],
+}
+RATE_LIMIT_LOCK = threading.Lock()
+RATE_LIMIT_STATE = {"resume_at": 0.0}
 
 
 # Helper functions
@@ -40,6 +97,100 @@ def run_cmd(cmd: list[str]) -> None:
         error_and_exit()
 
 
+class RateLimitRetry(Retry):
+    """
+    Retry policy that also retries non-idempotent requests on HTTP 429.
+    """
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code == 429:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that applies a default timeout to every request.
+    """
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = HTTP_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+@cache
+def get_session() -> requests.Session:
+    """
+    Helper to get a pooled HTTP session with keep-alive and retries.
+    """
+    retries = RateLimitRetry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def set_session_pool_size(pool_size: int) -> None:
+    """
+    Helper to grow the connection pool of the session to the number of workers.
+
+    Connections above the pool size are discarded after every request, so a
+    smaller pool would open a new connection for most requests.
+    """
+    if pool_size <= HTTP_POOL_SIZE:
+        return
+    session = get_session()
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=pool_size,
+        max_retries=session.get_adapter("https://").max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def wait_for_rate_limit() -> None:
+    """
+    Helper to pause while the Personio rate limit window is exhausted.
+    """
+    with RATE_LIMIT_LOCK:
+        delay = RATE_LIMIT_STATE["resume_at"] - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def update_rate_limit(response: requests.models.Response) -> None:
+    """
+    Helper to record the Personio rate limit headers of a response.
+    """
+    try:
+        remaining = int(response.headers["X-RateLimit-Remaining"])
+        reset = float(response.headers["X-RateLimit-Reset"])
+    except (KeyError, ValueError):
+        return
+    if remaining > 0:
+        return
+    # The reset header is either an epoch timestamp or a number of seconds
+    delay = reset - time.time() if reset > 1_000_000_000 else reset
+    with RATE_LIMIT_LOCK:
+        RATE_LIMIT_STATE["resume_at"] = max(
+            RATE_LIMIT_STATE["resume_at"], time.monotonic() + delay
+        )
+
+
 def validate_http_status_code(response: requests.models.Response) -> None:
     """
     Helper validate and error on http status code.
@@ -56,10 +207,67 @@ def validate_json_key(json_key: str, json_data: Any) -> None:
         error_and_exit(f"JSON key {json_key} not found.")
 
 
-def get_auth_token(client_id: str, client_secret: str) -> str:
+def get_token_cache_path(client_id: str) -> str:
+    """
+    Helper to get the token cache file of a client_id.
+    """
+    file_name = hashlib.sha256(client_id.encode("utf-8")).hexdigest() + ".json"
+    return os.path.join(TOKEN_CACHE_DIR, file_name)
+
+
+def read_cached_token(client_id: str) -> str:
+    """
+    Helper to read a cached auth token that has not expired yet.
+    """
+    cache_path = get_token_cache_path(client_id)
+    try:
+        file_stat = os.stat(cache_path)
+        if file_stat.st_uid != os.getuid() or file_stat.st_mode & 0o077:
+            typer.secho(
+                f"Ignoring token cache with unsafe permissions: {cache_path}",
+                fg=typer.colors.YELLOW,
+            )
+            return ""
+        with open(cache_path) as f:
+            cached_token = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    if cached_token.get("expires_at", 0) - TOKEN_EXPIRY_MARGIN <= time.time():
+        return ""
+    return cached_token.get("access_token", "")
+
+
+def write_cached_token(client_id: str, access_token: str, expires_in: int) -> None:
+    """
+    Helper to store an auth token readable only by the current user.
+    """
+    cache_path = get_token_cache_path(client_id)
+    temp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(TOKEN_CACHE_DIR, mode=0o700, exist_ok=True)
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {"access_token": access_token, "expires_at": time.time() + expires_in},
+                f,
+            )
+        os.replace(temp_path, cache_path)
+    except OSError:
+        typer.secho(
+            f"Auth token could not be cached in {TOKEN_CACHE_DIR}.",
+            fg=typer.colors.YELLOW,
+        )
+
+
+def get_auth_token(client_id: str, client_secret: str, refresh: bool = False) -> str:
     """
     Helper function to get auth token from Personio API.
     """
+    if not refresh:
+        return_data = read_cached_token(client_id)
+        if return_data:
+            return return_data
+
     return_data = ""
     endpoint_url = PERSONIO_BASE_URL + "/auth/token"
     payload = {
@@ -72,66 +280,523 @@ def get_auth_token(client_id: str, client_secret: str) -> str:
         "content-type": "application/x-www-form-urlencoded",
     }
     try:
-        response = requests.post(endpoint_url, data=payload, headers=headers)
+        response = get_session().post(endpoint_url, data=payload, headers=headers)
         validate_http_status_code(response)
         json_data = response.json()
         validate_json_key("access_token", json_data)
         return_data = json_data["access_token"]
+        if "expires_in" in json_data:
+            write_cached_token(client_id, return_data, int(json_data["expires_in"]))
     except requests.exceptions.RequestException as e:
         error_and_exit(f"API request error. {e.strerror}")
     return return_data
 
 
-def get_working_days_for_next_four_weeks(start_date: str, weeks: int) -> list[str]:
+class PersonioAuth(requests.auth.AuthBase):
+    """
+    Bearer token auth that refreshes the auth token once on HTTP 401.
+    """
+
+    def __init__(self, client_id: str, client_secret: str) -> None:
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.access_token = get_auth_token(client_id, client_secret)
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        request.headers["authorization"] = "Bearer " + self.access_token
+        request.register_hook("response", self.handle_401)
+        return request
+
+    def handle_401(self, response, **kwargs):
+        if response.status_code != 401:
+            return response
+        stale_header = response.request.headers["authorization"]
+        with self.lock:
+            # Another thread may have refreshed the token already
+            if stale_header == "Bearer " + self.access_token:
+                self.access_token = get_auth_token(
+                    self.client_id, self.client_secret, refresh=True
+                )
+        response.content
+        response.close()
+        request = response.request.copy()
+        request.headers["authorization"] = "Bearer " + self.access_token
+        request.deregister_hook("response", self.handle_401)
+        retry_response = response.connection.send(request, **kwargs)
+        retry_response.history.append(response)
+        retry_response.request = request
+        return retry_response
+
+
+def get_easter_sunday(year: int) -> date:
     """
-    Return the working days for the following 4 weeks starting from the previous Monday.
+    Helper to compute Easter Sunday with the anonymous Gregorian algorithm.
     """
-    req_date = datetime.strptime(start_date, "%Y-%m-%d")
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@cache
+def get_holidays(region: str, year: int) -> frozenset[date]:
+    """
+    Helper to get the public holidays of a region, i.e. DE-BY, in a year.
+    """
+    region = region.upper()
+    country = region.split("-")[0]
+    if region not in FIXED_HOLIDAYS:
+        error_and_exit(
+            f"Unknown holiday region {region}. Use one of: {', '.join(FIXED_HOLIDAYS)}."
+        )
+
+    easter_sunday = get_easter_sunday(year)
+    holidays = set()
+    for rules_region in {country, region}:
+        holidays.update(
+            date(year, month, day)
+            for month, day in FIXED_HOLIDAYS.get(rules_region, [])
+        )
+        holidays.update(
+            easter_sunday + timedelta(days=offset)
+            for offset in EASTER_HOLIDAYS.get(rules_region, [])
+        )
+    if region == "DE-SN":
+        # Day of Repentance and Prayer, the Wednesday before November 23
+        november_22 = date(year, 11, 22)
+        holidays.add(november_22 - timedelta(days=(november_22.weekday() - 2) % 7))
+    return frozenset(holidays)
+
+
+def get_working_days_for_next_four_weeks(
+    start_date: str, weeks: int, holiday_region: str = ""
+) -> list[date]:
+    """
+    Return the working days for the following weeks starting from the previous Monday.
+
+    Public holidays of the holiday region are left out.
+    """
+    req_date = date.fromisoformat(start_date)
     # Find the previous Monday
     last_monday = req_date - timedelta(days=req_date.weekday())
 
-    # Generate working days for the next 4 weeks
     working_days = []
-    for week in range(weeks):
-        week_start = last_monday + timedelta(weeks=week)
-        for day in range(5):  # Monday to Friday
-            work_day = week_start + timedelta(days=day)
-            working_days.append(work_day.strftime("%Y-%m-%d"))
-
+    for offset in range(weeks * 7):
+        work_day = last_monday + timedelta(days=offset)
+        if work_day.weekday() >= 5:
+            continue
+        if holiday_region and work_day in get_holidays(holiday_region, work_day.year):
+            continue
+        working_days.append(work_day)
     return working_days
 
 
+def get_headers() -> dict[str, str]:
+    """
+    Helper to build the Personio API headers.
+    """
+    return {
+        "accept": "application/json",
+        "Beta": "true",
+        "content-type": "application/json",
+    }
+
+
+def build_attendance_payload(
+    employee_id: str,
+    start_date: str,
+    slot: str,
+    start_times: dict[str, str] = DEFAULT_START_TIME,
+    end_times: dict[str, str] = DEFAULT_END_TIME,
+) -> dict:
+    """
+    Helper to build the attendance period payload of a day slot.
+    """
+    return {
+        "person": {"id": employee_id},
+        "type": "WORK",
+        "start": {"date_time": start_date + "T" + start_times[slot]},
+        "end": {"date_time": start_date + "T" + end_times[slot]},
+    }
+
+
+def send_personio_request(
+    method: str, endpoint_url: str, auth: PersonioAuth, payload: dict | None = None
+) -> requests.models.Response:
+    """
+    Helper to send a rate limited request to the Personio API.
+    """
+    wait_for_rate_limit()
+    response = get_session().request(
+        method, endpoint_url, headers=get_headers(), auth=auth, json=payload
+    )
+    update_rate_limit(response)
+    response.raise_for_status()
+    return response
+
+
 def create_personio_attendance(
-    access_token: str, employee_id: str, start_date: str
+    auth: PersonioAuth,
+    employee_id: str,
+    start_date: str,
+    start_times: dict[str, str] = DEFAULT_START_TIME,
+    end_times: dict[str, str] = DEFAULT_END_TIME,
 ) -> None:
     """
     Helper function to create a single-day attendance.
     """
-    DEFAULT_START_TIME = {
-        "MORNING": "08:30:00",
-        "AFTERNOON": "13:00:00",
+    endpoint_url = PERSONIO_BASE_URL + "/attendance-periods?skip_approval=true"
+    for slot in start_times:
+        payload = build_attendance_payload(
+            employee_id, start_date, slot, start_times, end_times
+        )
+        send_personio_request("POST", endpoint_url, auth, payload)
+
+
+def get_personio_pages(auth: PersonioAuth, endpoint_url: str, params: dict):
+    """
+    Helper to iterate over the items of every page of a Personio listing.
+    """
+    while endpoint_url:
+        wait_for_rate_limit()
+        response = get_session().get(
+            endpoint_url, headers=get_headers(), auth=auth, params=params
+        )
+        update_rate_limit(response)
+        response.raise_for_status()
+        json_data = response.json()
+        yield from json_data.get("_data", [])
+        # The next page link already carries the query parameters
+        next_link = json_data.get("_meta", {}).get("links", {}).get("next") or {}
+        endpoint_url = next_link.get("href", "")
+        params = None
+
+
+def get_personio_absences(
+    auth: PersonioAuth, employee_id: str, first_date: str, last_date: str
+) -> set[str]:
+    """
+    Helper to get the days of a date range covered by absence periods.
+    """
+    endpoint_url = PERSONIO_BASE_URL + "/absence-periods"
+    params = {
+        "person.id": employee_id,
+        "starts_from.date_time.lte": last_date + "T23:59:59",
+        "ends_at.date_time.gte": first_date + "T00:00:00",
+        "limit": ATTENDANCE_PAGE_SIZE,
     }
-    DEFAULT_END_TIME = {
-        "MORNING": "12:30:00",
-        "AFTERNOON": "17:00:00",
+    absent_days = set()
+    for period in get_personio_pages(auth, endpoint_url, params):
+        absence_day = date.fromisoformat(period["starts_from"]["date_time"][:10])
+        end_at = (period.get("ends_at") or {}).get("date_time") or last_date
+        last_absence_day = date.fromisoformat(end_at[:10])
+        while absence_day <= last_absence_day:
+            absent_days.add(absence_day.isoformat())
+            absence_day += timedelta(days=1)
+    return absent_days
+
+
+def get_personio_attendances(
+    auth: PersonioAuth, employee_id: str, first_date: str, last_date: str
+) -> dict[str, list[dict]]:
+    """
+    Helper to get the existing work periods of a date range indexed by day.
+    """
+    endpoint_url = PERSONIO_BASE_URL + "/attendance-periods"
+    params = {
+        "person.id": employee_id,
+        "start.date_time.gte": first_date + "T00:00:00",
+        "start.date_time.lte": last_date + "T23:59:59",
+        "limit": ATTENDANCE_PAGE_SIZE,
     }
+    periods_by_day: dict[str, list[dict]] = {}
+    for period in get_personio_pages(auth, endpoint_url, params):
+        if period.get("type") != "WORK":
+            continue
+        day = period["start"]["date_time"][:10]
+        periods_by_day.setdefault(day, []).append(period)
 
-    endpoint_url = PERSONIO_BASE_URL + "/attendance-periods?skip_approval=true"
-    headers = {
-        "accept": "application/json",
-        "Beta": "true",
-        "content-type": "application/json",
-        "authorization": "Bearer " + access_token,
+    for periods in periods_by_day.values():
+        periods.sort(key=lambda period: period["start"]["date_time"])
+    return periods_by_day
+
+
+def plan_personio_sync(
+    employee_id: str,
+    start_date: str,
+    periods: list[dict],
+    start_times: dict[str, str] = DEFAULT_START_TIME,
+    end_times: dict[str, str] = DEFAULT_END_TIME,
+) -> list[tuple[str, str, dict | None]]:
+    """
+    Helper to compute the requests needed for a day to match the slots.
+
+    Existing periods are matched to the slots in chronological order, periods
+    with different times are patched and leftover periods are deleted.
+    """
+    changes: list[tuple[str, str, dict | None]] = []
+    base_url = PERSONIO_BASE_URL + "/attendance-periods"
+    for index, slot in enumerate(start_times):
+        payload = build_attendance_payload(
+            employee_id, start_date, slot, start_times, end_times
+        )
+        if index >= len(periods):
+            changes.append(("POST", base_url + "?skip_approval=true", payload))
+            continue
+        period = periods[index]
+        if (
+            period["start"]["date_time"][:19] != payload["start"]["date_time"]
+            or period["end"]["date_time"][:19] != payload["end"]["date_time"]
+        ):
+            changes.append(
+                (
+                    "PATCH",
+                    base_url + f"/{period['id']}?skip_approval=true",
+                    {"start": payload["start"], "end": payload["end"]},
+                )
+            )
+    for period in periods[len(start_times) :]:
+        changes.append(("DELETE", base_url + f"/{period['id']}", None))
+    return changes
+
+
+def sync_personio_attendance(
+    auth: PersonioAuth, changes: list[tuple[str, str, dict | None]]
+) -> None:
+    """
+    Helper to apply the planned requests of a single day.
+    """
+    for method, endpoint_url, payload in changes:
+        send_personio_request(method, endpoint_url, auth, payload)
+
+
+def format_bulk_time(value: Any) -> str:
+    """
+    Helper to validate a bulk file time and normalize it to HH:MM:SS.
+    """
+    parts = str(value).strip().split(":")
+    try:
+        if not isinstance(value, str) or len(parts) not in (2, 3):
+            raise ValueError
+        return datetime.strptime(":".join([*parts, "00"][:3]), "%H:%M:%S").strftime(
+            "%H:%M:%S"
+        )
+    except ValueError:
+        error_and_exit(f"Invalid bulk time: {value}, expected HH:MM or HH:MM:SS.")
+
+
+def get_bulk_yaml_loader():
+    """
+    Helper to get a YAML loader that keeps unquoted times as strings.
+
+    YAML 1.1 reads 9:00 as the base-60 integer 540, so only decimal integers
+    are resolved and times are validated by format_bulk_time.
+    """
+    import re
+    import yaml
+
+    class BulkLoader(yaml.SafeLoader):
+        pass
+
+    BulkLoader.yaml_implicit_resolvers = {
+        first: [
+            (tag, regexp) for tag, regexp in resolvers if tag != "tag:yaml.org,2002:int"
+        ]
+        for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
     }
-    for item in list(DEFAULT_START_TIME.keys()):
-        payload = {
-            "person": {"id": employee_id},
-            "type": "WORK",
-            "start": {"date_time": start_date + "T" + DEFAULT_START_TIME[item]},
-            "end": {"date_time": start_date + "T" + DEFAULT_END_TIME[item]},
-        }
-        response = requests.post(endpoint_url, headers=headers, json=payload)
-        validate_http_status_code(response)
+    BulkLoader.add_implicit_resolver(
+        "tag:yaml.org,2002:int", re.compile(r"^[-+]?[0-9]+$"), list("-+0123456789")
+    )
+    return BulkLoader
+
+
+def load_bulk_file(bulk_file: str) -> list[dict]:
+    """
+    Helper to load the employees and date ranges of a CSV or YAML file.
+
+    CSV columns: employee_id, start_date, weeks and optionally morning_start,
+    morning_end, afternoon_start and afternoon_end. YAML entries use the same
+    keys with an optional times mapping, i.e. {MORNING: {start, end}}.
+    """
+    try:
+        with open(bulk_file, newline="") as f:
+            if bulk_file.endswith((".yml", ".yaml")):
+                import yaml
+
+                rows = yaml.load(f, Loader=get_bulk_yaml_loader()) or []
+            else:
+                import csv
+
+                rows = list(csv.DictReader(f))
+    except Exception as e:
+        error_and_exit(f"Bulk file could not be loaded: {e}")
+
+    entries = []
+    for row in rows:
+        if not row.get("employee_id"):
+            error_and_exit(f"Bulk entry is missing employee_id: {row}")
+        start_times = dict(DEFAULT_START_TIME)
+        end_times = dict(DEFAULT_END_TIME)
+        times = row.get("times") or {}
+        for slot in DEFAULT_START_TIME:
+            slot_times = times.get(slot) or {}
+            start_times[slot] = format_bulk_time(
+                slot_times.get("start")
+                or row.get(f"{slot.lower()}_start")
+                or start_times[slot]
+            )
+            end_times[slot] = format_bulk_time(
+                slot_times.get("end")
+                or row.get(f"{slot.lower()}_end")
+                or end_times[slot]
+            )
+        entries.append(
+            {
+                "employee_id": str(row["employee_id"]),
+                "start_date": str(
+                    row.get("start_date") or datetime.now().strftime("%Y-%m-%d")
+                ),
+                "weeks": int(row.get("weeks") or 0),
+                "holiday_region": str(row.get("holiday_region") or ""),
+                "start_times": start_times,
+                "end_times": end_times,
+            }
+        )
+    return entries
+
+
+def get_attendance_jobs(
+    entries: list[dict], holiday_region: str = ""
+) -> dict[tuple[str, str], dict]:
+    """
+    Helper to expand the date ranges into one job per employee and billable day.
+
+    Later entries win when the ranges of an employee overlap.
+    """
+    jobs = {}
+    for entry in entries:
+        region = entry.get("holiday_region") or holiday_region
+        if entry["weeks"] == 0:
+            attendance_day = date.fromisoformat(entry["start_date"])
+            attendance_days = [attendance_day]
+            if region and attendance_day in get_holidays(region, attendance_day.year):
+                typer.secho(
+                    f" - {entry['employee_id']} {attendance_day}: holiday",
+                    fg=typer.colors.YELLOW,
+                )
+                attendance_days = []
+        else:
+            attendance_days = get_working_days_for_next_four_weeks(
+                entry["start_date"], entry["weeks"], region
+            )
+        for day in attendance_days:
+            jobs[(entry["employee_id"], day.isoformat())] = entry
+    return jobs
+
+
+def submit_personio_attendances(
+    auth: PersonioAuth,
+    jobs: dict[tuple[str, str], dict],
+    concurrency: int,
+    sync: bool = False,
+    skip_absences: bool = False,
+) -> dict[str, str]:
+    """
+    Helper to create the attendances of several employees and days concurrently.
+
+    Returns the error message of every day that could not be created.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    employee_days: dict[str, list[str]] = {}
+    for employee_id, day in jobs:
+        employee_days.setdefault(employee_id, []).append(day)
+
+    failed_days = {}
+    set_session_pool_size(concurrency)
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        if skip_absences:
+            absence_futures = {
+                employee_id: executor.submit(
+                    get_personio_absences, auth, employee_id, min(days), max(days)
+                )
+                for employee_id, days in employee_days.items()
+            }
+            for employee_id, future in absence_futures.items():
+                try:
+                    absent_days = future.result()
+                except requests.exceptions.RequestException as e:
+                    error_and_exit(
+                        f"Absences of {employee_id} could not be fetched. {e}"
+                    )
+                for day in sorted(absent_days.intersection(employee_days[employee_id])):
+                    typer.secho(
+                        f" - {employee_id} {day}: absent", fg=typer.colors.YELLOW
+                    )
+                    del jobs[(employee_id, day)]
+
+        if sync:
+            existing_futures = {
+                employee_id: executor.submit(
+                    get_personio_attendances, auth, employee_id, min(days), max(days)
+                )
+                for employee_id, days in employee_days.items()
+            }
+            existing_periods = {}
+            for employee_id, future in existing_futures.items():
+                try:
+                    existing_periods[employee_id] = future.result()
+                except requests.exceptions.RequestException as e:
+                    error_and_exit(
+                        f"Existing attendances of {employee_id} could not be fetched. {e}"
+                    )
+
+        futures = {}
+        for (employee_id, day), entry in jobs.items():
+            label = f"{employee_id} {day}"
+            if not sync:
+                futures[label] = executor.submit(
+                    create_personio_attendance,
+                    auth,
+                    employee_id,
+                    day,
+                    entry["start_times"],
+                    entry["end_times"],
+                )
+                continue
+            changes = plan_personio_sync(
+                employee_id,
+                day,
+                existing_periods[employee_id].get(day, []),
+                entry["start_times"],
+                entry["end_times"],
+            )
+            if changes:
+                futures[label] = executor.submit(
+                    sync_personio_attendance, auth, changes
+                )
+            else:
+                typer.secho(f" - {label}: unchanged", fg=typer.colors.YELLOW)
+
+        for label, future in futures.items():
+            try:
+                future.result()
+                typer.secho(
+                    f" - {label}: {'synced' if sync else 'created'}",
+                    fg=typer.colors.BLUE,
+                )
+            except requests.exceptions.RequestException as e:
+                failed_days[label] = str(e)
+                typer.secho(f" - {label}: failed ({e})", fg=typer.colors.RED)
+    return failed_days
 
 
 # Main script
@@ -164,10 +829,9 @@ def main(
             "--employee-id",
             "-i",
             envvar="SCRIPT_EMPLOYEE_ID",
-            prompt="Employee ID",
             help="i.e.: 123456",
         ),
-    ],
+    ] = "",
     attendance_date: Annotated[
         str,
         typer.Option(
@@ -186,21 +850,75 @@ def main(
             help="i.e.: 4",
         ),
     ] = 0,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-n",
+            envvar="SCRIPT_CONCURRENCY",
+            help="Number of days submitted in parallel",
+        ),
+    ] = 4,
+    sync: Annotated[
+        bool,
+        typer.Option(
+            "--sync",
+            "-s",
+            help="Only send the changes needed to match the existing attendances",
+        ),
+    ] = False,
+    bulk_file: Annotated[
+        str,
+        typer.Option(
+            "--bulk-file",
+            "-b",
+            envvar="SCRIPT_BULK_FILE",
+            help="CSV or YAML file with employee_id, start_date and weeks",
+        ),
+    ] = "",
+    holiday_region: Annotated[
+        str,
+        typer.Option(
+            "--holiday-region",
+            "-r",
+            envvar="SCRIPT_HOLIDAY_REGION",
+            help="Skip the public holidays of a region, i.e.: DE-BY",
+        ),
+    ] = "",
+    skip_absences: Annotated[
+        bool,
+        typer.Option(
+            "--skip-absences",
+            "-a",
+            help="Skip the days covered by Personio absence periods",
+        ),
+    ] = False,
 ) -> None:
     """
     Create a single-day attendance.
     """
-    access_token = get_auth_token(client_id, client_secret)
-
-    start_date = attendance_date or datetime.now().strftime("%Y-%m-%d")
-    if attendance_weeks == 0:
-        create_personio_attendance(access_token, employee_id, start_date)
+    if bulk_file:
+        entries = load_bulk_file(bulk_file)
     else:
-        create_attendance_weeks = get_working_days_for_next_four_weeks(
-            start_date, attendance_weeks
+        entries = [
+            {
+                "employee_id": employee_id or typer.prompt("Employee ID"),
+                "start_date": attendance_date or datetime.now().strftime("%Y-%m-%d"),
+                "weeks": attendance_weeks,
+                "start_times": DEFAULT_START_TIME,
+                "end_times": DEFAULT_END_TIME,
+            }
+        ]
+    jobs = get_attendance_jobs(entries, holiday_region)
+
+    auth = PersonioAuth(client_id, client_secret)
+    failed_days = submit_personio_attendances(
+        auth, jobs, concurrency, sync, skip_absences
+    )
+    if failed_days:
+        error_and_exit(
+            f"{len(failed_days)} of {len(jobs)} attendances could not be added."
         )
-        for i in create_attendance_weeks:
-            create_personio_attendance(access_token, employee_id, i)
 
     typer.secho("Attendance added successfully.", fg=typer.colors.GREEN)
 